@@ -1,9 +1,30 @@
-from typing import Generator
-from app.core.database import SessionLocal
+from typing import Dict, Optional
+from fastapi import HTTPException, UploadFile
+from app.services.parsed_resume_service import parse_resume_upload, get_parsed_resume
+from app.services.pdf_worker import PdfLimitError, PdfProcessingError
 
-def get_db() -> Generator:
+async def load_parsed_resume(file: Optional[UploadFile], parsed_resume_id: Optional[str]) -> Dict:
+    """
+    Shared by the resume and job endpoints: returns the parsed resume for
+    either a fresh PDF upload or the parsed_resume_id of an earlier one.
+    """
+    if parsed_resume_id is not None:
+        parsed = await get_parsed_resume(parsed_resume_id)
+        if not parsed:
+            raise HTTPException(status_code=404, detail="Parsed resume not found")
+        return parsed
+
+    if file is None:
+        raise HTTPException(status_code=400, detail="Upload a PDF or pass a parsed_resume_id")
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files allowed")
+
+    content = await file.read()
     try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
+        return await parse_resume_upload(content)
+    except PdfLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except PdfProcessingError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.interview import InterviewSession
-from app.services.interview_service import generate_interview_response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db, AsyncSessionLocal
+from app.core.streaming import streaming_response
+from app.services.interview_service import generate_interview_turn, stream_interview_turn
+from app.services.interview_context import load_context, needs_fold, fold_history
+from app.services.interview_message_service import create_session, get_session, append_messages, load_messages
+from app.services.interview_bank import take_opening, keep_opening, stats as opening_bank_stats
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -21,40 +24,25 @@ class ChatRequest(BaseModel):
 # --- Endpoints ---
 
 @router.post("/start")
-async def start_interview(request: StartInterviewRequest, db: Session = Depends(get_db)):
+async def start_interview(request: StartInterviewRequest, db: AsyncSession = Depends(get_async_db)):
     """
-    Creates a new session and generates the first question.
+    Creates a new session with its first question in a single commit.
+    The question comes from the opening bank when this role is warm,
+    otherwise it is generated live.
     """
     try:
-        # Create empty session
-        new_session = InterviewSession(
-            user_email=request.user_email,
-            job_role=request.job_role,
-            difficulty=request.difficulty,
-            history=[]
-        )
-        db.add(new_session)
-        db.commit()
-        db.refresh(new_session)
-
-        # Generate first question (History is empty)
-        try:
-            ai_response = await generate_interview_response([], request.job_role, request.difficulty)
-        except Exception as ai_err:
-            print(f"ERROR: AI Generation Failed: {str(ai_err)}")
-            raise HTTPException(status_code=500, detail=f"AI Agent failed: {str(ai_err)}")
-        
-        # Update History
-        new_history = [{"role": "ai", "content": ai_response}]
-        new_session.history = new_history
-        
-        # Use flag_modified so SQLAlchemy knows the JSON changed
-        from sqlalchemy.orm.attributes import flag_modified
-        flag_modified(new_session, "history")
-        
-        db.commit()
-
-        return {"session_id": new_session.id, "message": ai_response}
+        ai_response, prompt_tokens = take_opening(request.job_role, request.difficulty), None
+        if ai_response is None:
+            try:
+                ai_response, prompt_tokens = await generate_interview_turn([], request.job_role, request.difficulty)
+            except Exception as ai_err:
+                print(f"ERROR: AI Generation Failed: {str(ai_err)}")
+                raise HTTPException(status_code=500, detail=f"AI Agent failed: {str(ai_err)}")
+            keep_opening(request.job_role, request.difficulty, ai_response)
+
+        session_id = await create_session(db, request.user_email, request.job_role, request.difficulty, ai_response, prompt_tokens)
+
+        return {"session_id": session_id, "message": ai_response}
     except Exception as e:
         print(f"ERROR starting interview: {str(e)}")
         if isinstance(e, HTTPException):
@@ -63,41 +51,119 @@ async def start_interview(request: StartInterviewRequest, db: Session = Depends(
 
 
 @router.post("/chat")
-async def chat_interview(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_interview(request: ChatRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
     """
     User sends an answer -> AI evaluates -> AI asks next Q.
+    Gemini gets the running summary plus the recent turns, not the whole transcript.
     """
     # 1. Get Session
-    session = db.query(InterviewSession).filter(InterviewSession.id == request.session_id).first()
+    session = await get_session(db, request.session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    job_role, difficulty = session.job_role, session.difficulty
+    summarized_through = session.summarized_through
 
-    # 2. Append User Answer to History
-    current_history = list(session.history) # Copy list
-    current_history.append({"role": "user", "content": request.user_answer})
+    # 2. Summary + recent turns + the new answer
+    context = await load_context(db, session)
+    current_history = context["history"] + [{"role": "user", "content": request.user_answer}]
+    # Don't hold a pooled connection open while Gemini thinks
+    await db.commit()
     
     # 3. Generate AI Response
-    ai_response_text = await generate_interview_response(
+    reply = await generate_interview_turn(
         current_history, 
-        session.job_role, 
-        session.difficulty
+        job_role, 
+        difficulty,
+        summary=context["summary"],
+        score_sheet=context["score_sheet"],
     )
     
-    # 4. Append AI Response to History
-    current_history.append({"role": "ai", "content": ai_response_text})
-    
-    # 5. Save to DB
-    session.history = current_history
-    from sqlalchemy.orm.attributes import flag_modified
-    flag_modified(session, "history")
-    
-    db.commit()
+    # 4. Append both messages (two INSERTs, nothing rewritten)
+    first_seq = await append_messages(db, request.session_id, [
+        ("user", request.user_answer),
+        ("ai", reply.content, reply.prompt_tokens),
+    ])
+
+    # 5. Fold turns that left the verbatim window into the summary, after responding
+    if needs_fold(first_seq + 1, summarized_through):
+        background_tasks.add_task(fold_history, request.session_id)
+
+    return {"message": reply.content}
+
+async def _save_turn(session_id: int, user_answer: str, ai_message: str, prompt_tokens: Optional[int]) -> int:
+    """Own session: the streaming response outlives the request's get_async_db session."""
+    async with AsyncSessionLocal() as db:
+        return await append_messages(db, session_id, [("user", user_answer), ("ai", ai_message, prompt_tokens)])
+
+@router.post("/chat/stream")
+async def chat_interview_stream(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    format: str = Query("sse", description="sse or ndjson"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Same as /chat, but forwards the reply as Gemini writes it.
+    Events: token (repeated, {"text"}), then done ({"message", "seq"}) or error.
+    Both messages are saved once the reply is complete; nothing is saved if
+    the stream fails or the client disconnects first.
+    """
+    session = await get_session(db, request.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    job_role, difficulty = session.job_role, session.difficulty
+    summarized_through = session.summarized_through
+
+    context = await load_context(db, session)
+    current_history = context["history"] + [{"role": "user", "content": request.user_answer}]
+    await db.commit()
 
-    return {"message": ai_response_text}
+    async def events():
+        reply = None
+        try:
+            async for kind, data in stream_interview_turn(
+                current_history, job_role, difficulty,
+                summary=context["summary"], score_sheet=context["score_sheet"],
+            ):
+                if kind == "token":
+                    yield "token", {"text": data}
+                else:
+                    reply = data
+        except Exception as e:
+            print(f"DEBUG: Interview stream failed: {str(e)}")
+            yield "error", {"detail": f"AI Agent failed: {str(e)}"}
+            return
+
+        try:
+            first_seq = await _save_turn(request.session_id, request.user_answer, reply.content, reply.prompt_tokens)
+        except Exception as e:
+            print(f"DEBUG: Error saving interview turn: {str(e)}")
+            yield "error", {"detail": f"Database save failed: {str(e)}"}
+            return
+
+        if needs_fold(first_seq + 1, summarized_through):
+            background_tasks.add_task(fold_history, request.session_id)
+        yield "done", {"message": reply.content, "seq": first_seq + 1}
+
+    return streaming_response(events(), format)
 
 @router.get("/history/{session_id}")
-def get_history(session_id: int, db: Session = Depends(get_db)):
-    session = db.query(InterviewSession).filter(InterviewSession.id == session_id).first()
+async def get_history(
+    session_id: int,
+    after_seq: int = Query(0, ge=0, description="Return messages after this seq (keyset cursor)"),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Messages in order as [{seq, role, content, prompt_tokens, created_at}]; pass the
+    last seq as after_seq for the next page. prompt_tokens is set on AI messages.
+    """
+    session = await get_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    return session.history
+    return await load_messages(db, session_id, after_seq, limit)
+
+@router.get("/bank-stats")
+def get_opening_bank_stats():
+    """Ready openings per (normalized role, difficulty)."""
+    return opening_bank_stats()
@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.job_search_service import search_jobs_google
-from app.services.resume_service import extract_text_from_pdf, extract_search_params_from_resume
-from app.models.job import SavedJob
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.services.job_search_service import search_jobs_google, search_jobs_hybrid, stream_jobs_google, search_cache
+from app.api.deps import load_parsed_resume
+from app.services.parsed_resume_service import resolve_search_params
+from app.services.job_ranking_service import rank_jobs
+from app.services.saved_job_service import save_jobs, delete_jobs, list_saved_jobs
+from app.core.streaming import streaming_response
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from typing import List, Optional
 
 router = APIRouter()
 
 # --- Response Model ---
+class ApplyOption(BaseModel):
+    title: Optional[str] = None
+    link: str
+
 class JobResult(BaseModel):
     title: str
     company_name: str
@@ -19,55 +28,88 @@ class JobResult(BaseModel):
     posted_at: Optional[str] = None
     thumbnail: Optional[str] = None
     is_verified: Optional[bool] = False
+    match_score: Optional[float] = None  # 0-100, only set by resume-based search
+    apply_options: List[ApplyOption] = []  # Same posting on other platforms
+
+async def stream_job_events(pages, rank_against: tuple = None):
+    """Turns page batches into ("job", JobResult) events, ending with ("done", {...})."""
+    count = 0
+    try:
+        async for page_jobs in pages:
+            if rank_against:
+                # Ranked within the page, since later pages are not known yet
+                page_jobs = rank_jobs(page_jobs, *rank_against)
+            for job in page_jobs:
+                count += 1
+                yield "job", jsonable_encoder(JobResult(**job))
+    except Exception as e:
+        print(f"ERROR while streaming jobs: {str(e)}")
+        yield "error", {"detail": f"Error fetching jobs: {str(e)}"}
+    yield "done", {"count": count}
+
 
 # ==========================================
 # SECTION 1: MANUAL SEARCH
 # ==========================================
+def build_manual_query(role: str, experience: str = None) -> str:
+    # Build a smart query string for Google Jobs
+    # Example: "Python Developer Entry Level Remote"
+    search_query = f"{role}"
+    if experience:
+        search_query += f" {experience}"
+    return search_query
+
 @router.get("/manual-search", response_model=List[JobResult])
-def manual_job_search(
+async def manual_job_search(
     role: str = Query(..., description="Job Role e.g. Python Developer"),
     location: str = Query("Remote", description="Location"),
     experience: str = Query(None, description="e.g. 'Entry Level', '3 years'"),
     time_range: str = Query(None, description="today, 3days, week, month"),
-    platforms: str = Query(None, description="Comma separated platforms")
+    platforms: str = Query(None, description="Comma separated platforms"),
+    mode: str = Query("live", description="live (SerpAPI) or corpus (local index first, SerpAPI top-up)")
 ):
     """
     User manually enters details. Backend builds the query string.
     """
-    # Build a smart query string for Google Jobs
-    # Example: "Python Developer Entry Level Remote"
-    search_query = f"{role}"
-    if experience:
-        search_query += f" {experience}"
+    search_query = build_manual_query(role, experience)
     
     print(f"Executing Manual Search: {search_query} in {location} for platforms: {platforms}")
-    results = search_jobs_google(search_query, location, time_range, platforms)
+    if mode == "corpus":
+        results = await search_jobs_hybrid(search_query, location, time_range, platforms)
+    else:
+        results = await search_jobs_google(search_query, location, time_range, platforms)
     return results
 
 
-# ==========================================
-# SECTION 2: SEARCH BY RESUME SCAN
-# ==========================================
-@router.post("/search-by-resume", response_model=List[JobResult])
-async def search_jobs_by_resume(
-    file: UploadFile = File(...),
-    location: str = Query("Remote", description="Preferred Location"),
-    time_range: str = Query(None, description="today, 3days, week, month") # <--- NEW
+@router.get("/manual-search/stream")
+async def manual_job_search_stream(
+    role: str = Query(..., description="Job Role e.g. Python Developer"),
+    location: str = Query("Remote", description="Location"),
+    experience: str = Query(None, description="e.g. 'Entry Level', '3 years'"),
+    time_range: str = Query(None, description="today, 3days, week, month"),
+    platforms: str = Query(None, description="Comma separated platforms"),
+    format: str = Query("ndjson", description="ndjson or sse")
 ):
     """
-    Uploads a resume -> AI extracts role/skills -> Auto-searches jobs.
-    Does NOT save the resume to DB (Stateless search).
+    Same as /manual-search, but emits each job as soon as its page is processed.
     """
-    # 1. Validate PDF
-    if file.content_type != "application/pdf":
-        raise HTTPException(status_code=400, detail="Only PDF files allowed")
-    
-    # 2. Extract Text
-    content = await file.read()
-    text = await extract_text_from_pdf(content)
+    search_query = build_manual_query(role, experience)
+    print(f"Executing Streaming Manual Search: {search_query} in {location} for platforms: {platforms}")
+    pages = stream_jobs_google(search_query, location, time_range, platforms)
+    return streaming_response(stream_job_events(pages), format)
+
+
+# ==========================================
+# SECTION 2: SEARCH BY RESUME SCAN
+# ==========================================
+async def resume_search_query(file: Optional[UploadFile], parsed_resume_id: Optional[str]):
+    """Loads the parsed resume (upload or parsed_resume_id) and builds the search query. Returns (query, text, params)."""
+    # 1-2. Validate PDF / reuse the parsed artifact
+    parsed = await load_parsed_resume(file, parsed_resume_id)
+    text = parsed["raw_text"]
     
-    # 3. AI Extraction (Specialized for Search)
-    params = await extract_search_params_from_resume(text)
+    # 3. Search params (local extractor at parse time, Gemini at most once per resume)
+    params = await resolve_search_params(parsed)
     
     # 4. Construct Query from AI Findings
     # params returns: {'role': 'Backend Dev', 'experience_level': 'Entry Level', 'skills': ['Python']}
@@ -77,12 +119,50 @@ async def search_jobs_by_resume(
     skills = " ".join(params.get("skills", [])[:2]) # Take top 2 skills
     
     search_query = f"{role} {skills} {exp}".strip()
+    return search_query, text, params
+
+@router.post("/search-by-resume", response_model=List[JobResult])
+async def search_jobs_by_resume(
+    file: Optional[UploadFile] = File(None),
+    parsed_resume_id: Optional[str] = Query(None, description="parsed_resume_id from /resume/parse, instead of a file"),
+    location: str = Query("Remote", description="Preferred Location"),
+    time_range: str = Query(None, description="today, 3days, week, month") # <--- NEW
+):
+    """
+    Uploads a resume (or references a parsed one) -> role/skills -> Auto-searches jobs.
+    The parsed resume is stored, so later calls can pass parsed_resume_id instead of the file.
+    """
+    search_query, text, params = await resume_search_query(file, parsed_resume_id)
     
     print(f"AI Auto-Search Query: {search_query}")
     
     # 5. Search
-    results = search_jobs_google(search_query, location, time_range)
-    return results
+    results = await search_jobs_google(search_query, location, time_range)
+
+    # 6. Rank locally against the resume (BM25, no extra LLM calls)
+    return rank_jobs(results, text, params.get("skills", []))
+
+
+@router.post("/search-by-resume/stream")
+async def search_jobs_by_resume_stream(
+    file: Optional[UploadFile] = File(None),
+    parsed_resume_id: Optional[str] = Query(None, description="parsed_resume_id from /resume/parse, instead of a file"),
+    location: str = Query("Remote", description="Preferred Location"),
+    time_range: str = Query(None, description="today, 3days, week, month"),
+    format: str = Query("ndjson", description="ndjson or sse")
+):
+    """
+    Same as /search-by-resume, but emits ranked jobs page by page.
+    """
+    search_query, text, params = await resume_search_query(file, parsed_resume_id)
+    print(f"AI Auto-Search Query (streaming): {search_query}")
+    pages = stream_jobs_google(search_query, location, time_range)
+    return streaming_response(stream_job_events(pages, (text, params.get("skills", []))), format)
+
+
+@router.get("/cache-stats")
+def get_search_cache_stats():
+    return search_cache.stats()
 
 
 # ==========================================
@@ -96,31 +176,56 @@ class JobSaveRequest(BaseModel):
     apply_link: str
     platform: str
 
+class BulkDeleteRequest(BaseModel):
+    user_email: str
+    ids: List[int]
+
 @router.post("/save")
-def save_job(job: JobSaveRequest, db: Session = Depends(get_db)):
-    existing = db.query(SavedJob).filter(
-        SavedJob.user_email == job.user_email, 
-        SavedJob.title == job.title, 
-        SavedJob.company_name == job.company_name
-    ).first()
-    
-    if existing:
+async def save_job(job: JobSaveRequest, db: AsyncSession = Depends(get_async_db)):
+    ids = await save_jobs(db, [job.dict()])
+    if not ids:
         return {"message": "Job already saved"}
+    return {"message": "Job saved successfully", "id": ids[0]}
 
-    new_job = SavedJob(**job.dict())
-    db.add(new_job)
-    db.commit()
-    return {"message": "Job saved successfully"}
+@router.post("/save/bulk")
+async def save_jobs_bulk(jobs: List[JobSaveRequest], db: AsyncSession = Depends(get_async_db)):
+    """Saves many jobs in one INSERT; ones already saved are skipped."""
+    if len(jobs) > settings.SAVED_JOBS_BULK_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {settings.SAVED_JOBS_BULK_LIMIT} jobs per request")
+    ids = await save_jobs(db, [job.dict() for job in jobs])
+    return {"saved": len(ids), "skipped": len(jobs) - len(ids), "ids": ids}
 
 @router.get("/saved/{user_email}")
-def get_saved_jobs(user_email: str, db: Session = Depends(get_db)):
-    return db.query(SavedJob).filter(SavedJob.user_email == user_email).all()
+async def get_saved_jobs(
+    user_email: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Saved jobs newest first, as a list of {id, title, company_name, location,
+    apply_link, platform, created_at}. When there are more, the X-Next-Cursor
+    response header holds the cursor for the next page.
+    """
+    try:
+        rows, next_cursor = await list_saved_jobs(db, user_email, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+@router.post("/saved/delete")
+async def delete_saved_jobs_bulk(request: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)):
+    """Removes several of a user's saved jobs in one DELETE; unknown ids are ignored."""
+    if len(request.ids) > settings.SAVED_JOBS_BULK_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {settings.SAVED_JOBS_BULK_LIMIT} jobs per request")
+    deleted = await delete_jobs(db, request.ids, user_email=request.user_email)
+    return {"deleted": len(deleted), "ids": deleted}
 
 @router.delete("/saved/{job_id}")
-def delete_saved_job(job_id: int, db: Session = Depends(get_db)):
-    job = db.query(SavedJob).filter(SavedJob.id == job_id).first()
-    if not job:
+async def delete_saved_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await delete_jobs(db, [job_id]):
         raise HTTPException(status_code=404, detail="Job not found")
-    db.delete(job)
-    db.commit()
-    return {"message": "Job removed successfully"}
\ No newline at end of file
+    return {"message": "Job removed successfully"}
@@ -1,38 +1,44 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, BackgroundTasks, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, UploadFile, File, Form, Depends, BackgroundTasks, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+from typing import List, Optional, Tuple
+from app.api.deps import load_parsed_resume
+from app.services.parsed_resume_service import public_view
+from app.core.streaming import streaming_response
+from app.core.database import get_async_db, AsyncSessionLocal
+from app.core.pagination import keyset_page
 from app.models.resume import ResumeAnalysis
-from app.services.resume_service import extract_text_from_pdf, analyze_resume_with_llm
+from app.services.resume_service import analyze_resume_with_llm, stream_resume_analysis
 from app.services.email_service import send_resume_feedback_email
+from app.services.batch_service import expand_uploads, submit_batch, load_batch, watch_batch
 
 router = APIRouter()
 
 @router.post("/analyze")
 async def analyze_resume(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    parsed_resume_id: Optional[str] = Form(None),  # From /parse or an earlier analysis, instead of a file
     email: str = Form(...),
     job_role: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # 1. Validate PDF
+    # 1. Validate PDF / load the parsed resume
     print(f"DEBUG: Starting analysis for {email} - Job Role: {job_role}")
-    if file.content_type != "application/pdf":
-        print(f"DEBUG: Invalid file type: {file.content_type}")
-        raise HTTPException(status_code=400, detail="Only PDF files allowed")
-    
-    # 2. Process
-    content = await file.read()
-    print(f"DEBUG: File read, size: {len(content)} bytes")
     try:
-        text = await extract_text_from_pdf(content)
-        print(f"DEBUG: Text extracted, length: {len(text)} characters")
-        if not text.strip():
-             print("DEBUG: Extracted text is empty!")
-             raise HTTPException(status_code=400, detail="Could not extract text from this PDF. It might be an image-only PDF.")
+        parsed = await load_parsed_resume(file, parsed_resume_id)
+    except HTTPException as e:
+        print(f"DEBUG: Resume rejected: {e.detail}")
+        raise
     except Exception as e:
         print(f"DEBUG: Error extracting text: {str(e)}")
         raise HTTPException(status_code=500, detail=f"PDF extraction failed: {str(e)}")
+
+    # 2. Text (parsed once per PDF, reused on every later request)
+    text = parsed["raw_text"]
+    print(f"DEBUG: Using parsed resume {parsed['id']}, {len(text)} characters")
     
     # 3. Analyze
     try:
@@ -55,8 +61,7 @@ async def analyze_resume(
             analysis_json=analysis
         )
         db.add(db_resume)
-        db.commit()
-        db.refresh(db_resume)
+        await db.commit()  # expire_on_commit=False: id is already loaded
         print(f"DEBUG: Saved to DB with ID: {db_resume.id}")
         
         # AUTOMATIC EMAIL TRIGGER
@@ -75,19 +80,99 @@ async def analyze_resume(
     # 5. Return immediate result (User sees this on screen)
     return {
         "id": db_resume.id,
+        "analysis_id": db_resume.public_id,
+        "parsed_resume_id": parsed["parsed_resume_id"],
         "ats_score": db_resume.ats_score,
         "analysis_json": analysis,
         "message": "Analysis complete."
     }
 
+async def save_analysis(email: str, job_role: str, text: str, analysis: dict) -> Tuple[int, str]:
+    """
+    Stores one analysis in its own session (streaming responses outlive
+    get_async_db). Returns its id and analysis_id.
+    """
+    async with AsyncSessionLocal() as db:
+        db_resume = ResumeAnalysis(
+            email=email,
+            job_role=job_role,
+            raw_text=text,
+            ats_score=analysis.get("ats_score", 0),
+            analysis_json=analysis
+        )
+        db.add(db_resume)
+        await db.commit()
+        return db_resume.id, db_resume.public_id
+
+@router.post("/analyze/stream")
+async def analyze_resume_stream(
+    background_tasks: BackgroundTasks,
+    file: Optional[UploadFile] = File(None),
+    parsed_resume_id: Optional[str] = Form(None),
+    email: str = Form(...),
+    job_role: str = Form(...),
+    format: str = Query("sse", description="sse or ndjson")
+):
+    """
+    Same as /analyze, but pushes each top-level field of the analysis
+    ("ats_score", "summary", "brief_strengths", ...) as soon as Gemini has
+    written it. Events: resume, field (repeated), then done or error.
+    The analysis in "done" is authoritative (it is the fallback dict if
+    Gemini's full output turned out to be invalid JSON).
+    """
+    print(f"DEBUG: Starting streamed analysis for {email} - Job Role: {job_role}")
+    parsed = await load_parsed_resume(file, parsed_resume_id)
+    text = parsed["raw_text"]
+
+    async def events():
+        yield "resume", {"parsed_resume_id": parsed["parsed_resume_id"]}
+        analysis = None
+        try:
+            async for kind, data in stream_resume_analysis(text, job_role):
+                if kind == "field":
+                    yield "field", {"key": data[0], "value": data[1]}
+                else:
+                    analysis = data
+        except Exception as e:
+            print(f"DEBUG: Error during streamed LLM analysis: {str(e)}")
+            yield "error", {"detail": f"AI Analysis failed: {str(e)}"}
+            return
+
+        try:
+            saved_id, analysis_id = await save_analysis(email, job_role, text, analysis)
+            print(f"DEBUG: Saved to DB with ID: {saved_id}")
+        except Exception as e:
+            print(f"DEBUG: Error saving to DB: {str(e)}")
+            yield "error", {"detail": f"Database save failed: {str(e)}"}
+            return
+
+        # Runs once the stream has been fully sent
+        background_tasks.add_task(
+            send_resume_feedback_email,
+            to_email=email,
+            analysis=analysis,
+            job_role=job_role
+        )
+        yield "done", {
+            "id": saved_id,
+            "analysis_id": analysis_id,
+            "parsed_resume_id": parsed["parsed_resume_id"],
+            "ats_score": analysis.get("ats_score", 0),
+            "analysis_json": analysis,
+        }
+
+    return streaming_response(events(), format)
+
 @router.post("/send-email/{resume_id}")
 async def trigger_email(
     resume_id: int, 
     background_tasks: BackgroundTasks, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Fetch from DB
-    resume = db.query(ResumeAnalysis).filter(ResumeAnalysis.id == resume_id).first()
+    # Fetch from DB (the analysis, not the resume text)
+    resume = (await db.execute(
+        select(ResumeAnalysis).where(ResumeAnalysis.id == resume_id).options(undefer(ResumeAnalysis.analysis_json))
+    )).scalar_one_or_none()
     if not resume:
         raise HTTPException(404, "Resume not found")
         
@@ -99,4 +184,110 @@ async def trigger_email(
         job_role=resume.job_role
     )
     
-    return {"message": "Email is being sent!"}
\ No newline at end of file
+    return {"message": "Email is being sent!"}
+
+# ==========================================
+# ANALYSIS HISTORY
+# ==========================================
+@router.get("/history/{email}")
+async def get_resume_history(
+    email: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Past analyses for an email, newest first, as {analysis_id, job_role,
+    ats_score, created_at}. Open one with /resume/analysis/{analysis_id}.
+    When there are more, the X-Next-Cursor response header holds the cursor
+    for the next page.
+    """
+    query = select(
+        ResumeAnalysis.id, ResumeAnalysis.public_id.label("analysis_id"),
+        ResumeAnalysis.job_role, ResumeAnalysis.ats_score, ResumeAnalysis.created_at
+    ).where(ResumeAnalysis.email == email, ResumeAnalysis.public_id.is_not(None))
+    try:
+        rows, next_cursor = await keyset_page(db, query, ResumeAnalysis.created_at, ResumeAnalysis.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    # The sequential id only drives the cursor; it is not handed out
+    return [{key: value for key, value in row.items() if key != "id"} for row in rows]
+
+@router.get("/analysis/{analysis_id}")
+async def get_resume_analysis(
+    analysis_id: str,
+    email: str = Query(..., description="The email the analysis was run for"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """One analysis in full. The resume text itself is never returned."""
+    resume = (await db.execute(
+        select(ResumeAnalysis)
+        .where(ResumeAnalysis.public_id == analysis_id, ResumeAnalysis.email == email)
+        .options(undefer(ResumeAnalysis.analysis_json))
+    )).scalar_one_or_none()
+    if not resume:
+        raise HTTPException(404, "Analysis not found")
+
+    return {
+        "analysis_id": resume.public_id,
+        "job_role": resume.job_role,
+        "ats_score": resume.ats_score,
+        "created_at": resume.created_at,
+        "analysis_json": resume.analysis_json,
+    }
+
+@router.post("/parse")
+async def parse_resume(file: UploadFile = File(...)):
+    """
+    Parses a PDF once (sections, skills, titles, experience, search params).
+    Pass the returned parsed_resume_id to /resume/analyze or
+    /jobs/search-by-resume to skip re-uploading and re-parsing the same file.
+    """
+    parsed = await load_parsed_resume(file, None)
+    return public_view(parsed)
+
+@router.get("/parsed/{parsed_resume_id}")
+async def get_parsed(parsed_resume_id: str):
+    parsed = await load_parsed_resume(None, parsed_resume_id)
+    return public_view(parsed)
+
+
+# ==========================================
+# BULK ANALYSIS (placement cells)
+# ==========================================
+@router.post("/batch", status_code=202)
+async def analyze_resume_batch(
+    files: List[UploadFile] = File(..., description="PDFs and/or zips of PDFs"),
+    email: str = Form(...),
+    job_role: str = Form(...),
+):
+    """
+    Queues many resumes for analysis against one job role and returns at once.
+    Poll /batch/{batch_id} or stream /batch/{batch_id}/stream for progress.
+    """
+    uploads = [(file.filename, file.content_type, await file.read()) for file in files]
+    try:
+        pdfs, rejected = await run_in_threadpool(expand_uploads, uploads)
+        batch = await submit_batch(email, job_role, pdfs, rejected)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return dict(batch.summary(), items=[item.to_dict() for item in batch.items])
+
+@router.get("/batch/{batch_id}")
+async def get_resume_batch(batch_id: str, include_analysis: bool = Query(False)):
+    batch = await load_batch(batch_id, include_analysis)
+    if not batch:
+        raise HTTPException(404, "Batch not found")
+    return dict(batch.summary(), items=[item.to_dict(include_analysis) for item in batch.items])
+
+@router.get("/batch/{batch_id}/stream")
+async def stream_resume_batch(batch_id: str, format: str = Query("sse", description="sse or ndjson")):
+    """Per-item status events as they happen, ending with a "done" summary."""
+    batch = await load_batch(batch_id)
+    if not batch:
+        raise HTTPException(404, "Batch not found")
+    return streaming_response(watch_batch(batch), format)
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+from app.core.metrics import metrics
+
+# Sentinel so cached falsy values (e.g. an empty job list) still count as hits
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache with per-entry TTL and an optional stale window.
+
+    get_entry() returns (value, is_stale):
+      - fresh entry                -> (value, False)
+      - expired but within stale_ttl -> (value, True)   caller may serve it and refresh
+      - missing / fully expired    -> (MISSING, False)
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, default_ttl: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter(f"cache.{name}.hits")
+        self.stale_hits = metrics.counter(f"cache.{name}.stale_hits")
+        self.misses = metrics.counter(f"cache.{name}.misses")
+        self.evictions = metrics.counter(f"cache.{name}.evictions")
+        self.size = metrics.gauge(f"cache.{name}.size")
+
+    def get_entry(self, key: Hashable) -> Tuple[Any, bool]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses.inc()
+                return MISSING, False
+
+            value, expires_at, stale_until = entry
+            if now < expires_at:
+                self._data.move_to_end(key)
+                self.hits.inc()
+                return value, False
+            if now < stale_until:
+                self._data.move_to_end(key)
+                self.stale_hits.inc()
+                return value, True
+
+            # Past the stale window: drop it
+            del self._data[key]
+            self.size.set(len(self._data))
+            self.misses.inc()
+            return MISSING, False
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value, is_stale = self.get_entry(key)
+        if value is MISSING or is_stale:
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, stale_ttl: float = 0.0):
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (value, now + ttl, now + ttl + stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions.inc()
+            self.size.set(len(self._data))
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+            self.size.set(len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size.set(0)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits.value,
+            "stale_hits": self.stale_hits.value,
+            "misses": self.misses.value,
+            "evictions": self.evictions.value,
+        }
@@ -7,6 +7,85 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     GOOGLE_API_KEY: str
     SERPAPI_KEY: str = ""
+
+    # Database pool (the async engine serves the API; the sync one scripts and worker threads)
+    DB_POOL_SIZE: int = 5                   # Per engine, per worker process
+    DB_MAX_OVERFLOW: int = 10               # Extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT: float = 30.0           # Seconds to wait for a free connection before erroring
+    DB_POOL_RECYCLE: int = 1800             # Reopen connections older than this (-1 disables)
+    DB_PRE_PING: str = "idle"               # always (SELECT 1 on every checkout) | idle | never
+    DB_PRE_PING_IDLE_SECONDS: float = 60.0  # "idle": ping only connections unused for this long
+    DB_SLOW_STATEMENT_SECONDS: float = 1.0  # Statements slower than this are logged
+    DB_CONNECT_TIMEOUT: int = 10            # Seconds to open a Postgres connection before giving up
+
+    # Schema: create_all when the app starts (lifespan), or as a deploy step (scripts/init_db.py)
+    DB_CREATE_TABLES_ON_STARTUP: bool = True
+    DB_INIT_RETRIES: int = 10               # Background attempts when the DB is down at startup
+    DB_INIT_RETRY_DELAY: float = 1.0        # Seconds, doubled after each failed attempt (max 30)
+
+    # Job Search (SerpAPI) Tuning
+    SERPAPI_REQUEST_TIMEOUT: float = 10.0   # Per-page HTTP timeout (seconds)
+    SERPAPI_MAX_CONNECTIONS: int = 20       # Shared async client pool size
+    SEARCH_DEADLINE_SECONDS: float = 15.0   # Overall budget for one search
+    SEARCH_CACHE_MAXSIZE: int = 2000        # LRU entries (normalized queries)
+    SEARCH_CACHE_DEFAULT_TTL: float = 3600  # Used when no time_range is given
+    SEARCH_CACHE_STALE_SECONDS: float = 1800  # Serve stale + refresh in background
+    JOB_PROVIDERS: str = "serpapi"           # Comma separated, priority order: serpapi, fixture
+    SERPAPI_PROVIDER_TIMEOUT: float = 12.0  # Per-provider budget inside the fan-out
+    SERPAPI_HEDGE_AFTER: float = 0.0        # >0: send a hedged duplicate after N seconds (costs a call)
+    JOB_FIXTURE_PATH: str = ""              # Defaults to app/fixtures/jobs.json
+    FIXTURE_PROVIDER_TIMEOUT: float = 1.0
+    JOB_CORPUS_FRESH_HOURS: int = 48        # Corpus rows older than this are ignored
+    JOB_CORPUS_MIN_RESULTS: int = 10        # Local matches needed to skip SerpAPI
+    SAVED_JOBS_BULK_LIMIT: int = 200        # Jobs per bulk save / bulk delete request
+
+    # PDF Extraction (process pool + limits)
+    PDF_WORKERS: int = 2
+    PDF_MAX_BYTES: int = 5 * 1024 * 1024
+    PDF_MAX_PAGES: int = 20
+    PDF_EXTRACT_TIMEOUT: float = 15.0
+
+    # Gemini gateway (shared by every chain)
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    LLM_TEMPERATURE: float = 0.3
+    LLM_REQUESTS_PER_MINUTE: float = 60.0   # Token bucket refill rate: size it to the Gemini quota
+    LLM_BURST: int = 10                     # Bucket capacity
+    LLM_MAX_CONCURRENCY: int = 8            # Calls in flight at once
+    LLM_MAX_ATTEMPTS: int = 4               # Per call, on 429 / 5xx
+    LLM_BACKOFF_BASE: float = 1.0           # Seconds, doubled per attempt, full jitter
+    LLM_BACKOFF_MAX: float = 20.0
+    LLM_INTERACTIVE_QUEUE_TIMEOUT: float = 20.0  # Max wait for a slot (interview turns, single analyses)
+    LLM_BULK_QUEUE_TIMEOUT: float = 600.0        # Max wait for a slot (batch analyses)
+
+    # Interview opening bank (pre-generated first messages per role + difficulty)
+    INTERVIEW_BANK_DEPTH: int = 5           # Openings kept ready per (role, difficulty)
+    INTERVIEW_BANK_MAX_ROLES: int = 200     # Least recently used (role, difficulty) pairs are dropped
+    INTERVIEW_BANK_WARM_ROLES: str = ""     # Comma separated roles to fill at startup, e.g. "Software Engineer,Data Analyst"
+
+    # Interview context: the last N turns go to Gemini verbatim, older ones as a rolling summary
+    INTERVIEW_VERBATIM_TURNS: int = 4
+    INTERVIEW_SUMMARY_EVERY: int = 4        # Fold once this many turns beyond the verbatim window pile up
+
+    # Prompt budgets: resume text is compacted to at most this many (estimated) tokens
+    RESUME_TOKEN_BUDGET: int = 1500          # Resume analysis
+    SEARCH_PARAMS_TOKEN_BUDGET: int = 700    # Search params only need header/summary/skills/experience
+
+    # Local search-params extractor: below this confidence Gemini is asked instead
+    LOCAL_EXTRACTOR_MIN_CONFIDENCE: float = 0.7
+
+    # Resume Processing Cache (content-addressed; DB-backed with in-process LRU)
+    RESUME_CACHE_MAXSIZE: int = 512
+    RESUME_CACHE_MEMORY_TTL: float = 24 * 3600
+
+    # Bulk Resume Analysis (in-process queue)
+    BATCH_WORKERS: int = 4                  # Concurrent analyses, i.e. parallel Gemini calls
+    BATCH_MAX_FILES: int = 500              # PDFs per batch (zip members included)
+    BATCH_MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    BATCH_MAX_INFLATED_BYTES: int = 300 * 1024 * 1024  # PDF bytes per batch after unzipping (held in memory)
+    BATCH_MAX_ATTEMPTS: int = 3             # Per item, when Gemini reports quota exhaustion
+    BATCH_COMMIT_SIZE: int = 25             # Analyses written to `resumes` per commit
+    BATCH_COMMIT_INTERVAL: float = 2.0      # ...or after this many seconds, whichever comes first
+    BATCH_RETENTION_SECONDS: float = 6 * 3600  # Finished batches stay pollable this long
     
     # Email Config
     MAIL_USERNAME: str
@@ -1,27 +1,131 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import asyncio
+from typing import Optional
+from sqlalchemy import DateTime, create_engine
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
 from app.core.config import settings
+from app.core.db_pool import instrument_engine, pool_options
 
 # Supabase requires SSL connection
 database_url = settings.DATABASE_URL
 if database_url and database_url.startswith("postgresql://"):
     database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
 
+# SQLite is supported for local runs (no SSL, shared across threadpool workers)
+if database_url.startswith("sqlite"):
+    connect_args = {"check_same_thread": False}
+    async_database_url = database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    async_connect_args = {}
+else:
+    connect_args = {"sslmode": "require", "connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    # psycopg 3 serves both engines; the async one uses its AsyncConnection
+    async_database_url = database_url
+    async_connect_args = dict(connect_args)
+
+# ==========================================
+# ASYNC ENGINE (API endpoints and services on the event loop)
+# ==========================================
+async_engine = create_async_engine(
+    async_database_url,
+    connect_args=async_connect_args,
+    **pool_options(async_database_url, is_async=True)
+)
+instrument_engine(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: attributes stay readable after commit without
+# another (awaited) round trip
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# ==========================================
+# SYNC ENGINE (scripts, create_all, code that already runs in a thread)
+# ==========================================
 engine = create_engine(
     database_url,
-    connect_args={"sslmode": "require"},
-    pool_pre_ping=True
+    connect_args=connect_args,
+    **pool_options(database_url, is_async=False)
 )
+instrument_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+# created_at columns used by keyset pagination. SQLite's CURRENT_TIMESTAMP has
+# no fractional seconds; bind datetimes in the same text format so cursor
+# comparisons against stored values are exact
+CreatedAt = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
+# AsyncAttrs: deferred/lazy columns can be awaited (obj.awaitable_attrs.history)
+Base = declarative_base(cls=AsyncAttrs)
+
+# Dependencies for API Routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
-# Dependency for API Routes
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def dialect_insert(bind):
+    """INSERT construct with ON CONFLICT support for the engine's dialect (Postgres or SQLite)."""
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+# ==========================================
+# SCHEMA (app lifespan, scripts/init_db.py)
+# ==========================================
+_schema_task: Optional[asyncio.Task] = None
+
+def _print_connection_hint(error: Exception):
+    if "Network is unreachable" in str(error):
+        print("\n⚠️  RENDER/SUPABASE CONFIGURATION ISSUE DETECTED ⚠️")
+        print("It appears you are connecting to Supabase via IPv6, which Render does not fully support.")
+        print("👉 SOLUTION: Update your DATABASE_URL in Render to use the 'Connection Pooler' string.")
+        print("   Shape: postgresql://[user]:[pass]@[aws-region].pooler.supabase.com:6543/[db]")
+        print("   Find it in: Supabase Dashboard > Project Settings > Database > Connection String > Pooler\n")
+
+async def create_tables(attempts: int = 1) -> bool:
+    """Creates missing tables, retrying with exponential backoff. Returns False if every attempt failed."""
+    import app.models  # noqa: F401  Registers every model on Base.metadata
+
+    delay = settings.DB_INIT_RETRY_DELAY
+    for attempt in range(1, attempts + 1):
+        try:
+            async with async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            return True
+        except Exception as e:
+            print(f"❌ Database Connection Error (attempt {attempt}/{attempts}): {e}")
+            _print_connection_hint(e)
+            if attempt < attempts:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+    return False
+
+async def init_schema():
+    """
+    Startup hook. Tries create_all once; if the DB is unreachable the app
+    still starts (routes that need the DB fail until it is back) and the
+    remaining attempts run in the background.
+    """
+    global _schema_task
+    if await create_tables():
+        return
+    print("DEBUG: Starting without the database; retrying create_all in the background")
+    _schema_task = asyncio.create_task(create_tables(settings.DB_INIT_RETRIES))
+
+def cancel_schema_retries():
+    global _schema_task
+    task, _schema_task = _schema_task, None
+    if task is not None and not task.done():
+        task.cancel()
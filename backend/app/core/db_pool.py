@@ -0,0 +1,147 @@
+import time
+from typing import Dict
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Pool configuration and instrumentation shared by the sync and async engines.
+# Metrics are named db.<engine>.* ("sync" / "async") and show up on /metrics
+# next to llm.* and job_provider.*, so a slow request can be attributed to
+# waiting for a connection, the query itself, Gemini or SerpAPI.
+
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+STATEMENT_KINDS = ("select", "insert", "update", "delete")
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        prefix = f"db.{name}"
+        self.checkout_wait = metrics.histogram(f"{prefix}.pool.checkout_wait_seconds", "Time spent waiting for a pooled connection")
+        self.timeouts = metrics.counter(f"{prefix}.pool.timeouts", "Checkouts that gave up after DB_POOL_TIMEOUT")
+        self.checked_out = metrics.gauge(f"{prefix}.pool.checked_out")
+        self.saturation = metrics.gauge(f"{prefix}.pool.saturation", "checked_out / (pool size + max overflow)")
+        self.connects = metrics.counter(f"{prefix}.pool.connects", "New DB connections opened")
+        self.pings_failed = metrics.counter(f"{prefix}.pool.pings_failed")
+        self.statement = {
+            kind: metrics.histogram(f"{prefix}.statement.{kind}.seconds") for kind in STATEMENT_KINDS + ("other",)
+        }
+        self.errors = metrics.counter(f"{prefix}.statement.errors")
+
+
+class _TimedCheckout:
+    """Times the wait inside the pool (queueing + connecting) on every checkout."""
+
+    pool_metrics: PoolMetrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.pool_metrics:
+                self.pool_metrics.timeouts.inc()
+            raise
+        finally:
+            if self.pool_metrics:
+                self.pool_metrics.checkout_wait.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting to the same metrics
+        pool = super().recreate()
+        pool.pool_metrics = self.pool_metrics
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(database_url: str, is_async: bool) -> Dict:
+    """create_engine / create_async_engine keyword arguments from Settings."""
+    if settings.DB_PRE_PING not in PRE_PING_STRATEGIES:
+        raise ValueError(f"DB_PRE_PING must be one of {', '.join(PRE_PING_STRATEGIES)}")
+    options = {"pool_pre_ping": settings.DB_PRE_PING == "always"}
+    if ":memory:" in database_url:
+        return options  # In-memory SQLite keeps its single-connection pool
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def _statement_kind(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    kind = words[0].lower() if words else ""
+    return kind if kind in STATEMENT_KINDS else "other"
+
+
+def instrument_engine(engine, name: str):
+    """
+    Attaches pool and statement metrics (and the "idle" pre-ping strategy) to a
+    sync Engine; for an AsyncEngine pass engine.sync_engine.
+    """
+    pool_metrics = PoolMetrics(name)
+    pool = engine.pool
+    if isinstance(pool, _TimedCheckout):
+        pool.pool_metrics = pool_metrics
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+    def update_gauges(returning: int = 0):
+        checked_out = engine.pool.checkedout() - returning if hasattr(engine.pool, "checkedout") else 0
+        pool_metrics.checked_out.set(checked_out)
+        pool_metrics.saturation.set(round(checked_out / capacity, 3) if capacity else 0)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_metrics.connects.inc()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        # "idle": only connections that sat unused long enough to have been
+        # dropped by the server or the Supabase pooler pay for a ping
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if (
+            settings.DB_PRE_PING == "idle"
+            and checked_in_at is not None
+            and time.monotonic() - checked_in_at > settings.DB_PRE_PING_IDLE_SECONDS
+        ):
+            try:
+                engine.dialect.do_ping(dbapi_connection)
+            except Exception:
+                pool_metrics.pings_failed.inc()
+                # The pool discards this connection and retries with a new one
+                raise exc.DisconnectionError()
+        update_gauges()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+        update_gauges(returning=1)  # Fired before the pool takes the connection back
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["statement_started"].pop()
+        pool_metrics.statement[_statement_kind(statement)].observe(elapsed)
+        if elapsed >= settings.DB_SLOW_STATEMENT_SECONDS:
+            print(f"DEBUG: Slow {name} DB statement ({elapsed:.3f}s): {statement.strip().splitlines()[0][:160]}")
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(context):
+        pool_metrics.errors.inc()
+        started = context.connection.info.get("statement_started") if context.connection is not None else None
+        if started:
+            started.pop()
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Keyset ("seek") pagination for newest-first listings ordered by
+# (created_at, id). The cursor is the last row's key, so every page is an
+# index range scan no matter how deep the client pages, unlike OFFSET.
+# Endpoints hand the cursor back in the X-Next-Cursor response header.
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a cursor this module did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def keyset_page(db: AsyncSession, query, created_at_column, id_column, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Runs a column SELECT one page at a time, newest first. The selected
+    columns must include created_at_column and id_column (by those names).
+    Returns the rows as dicts and the cursor for the next page (None at the end).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Bind with the columns' types so SQLite compares the same text format it stores
+        boundary = tuple_(literal(created_at, created_at_column.type), literal(row_id, id_column.type))
+        query = query.where(tuple_(created_at_column, id_column) < boundary)
+    query = query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+    rows = [dict(row._mapping) for row in await db.execute(query)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][created_at_column.key], rows[-1][id_column.key])
+    return rows, next_cursor
@@ -0,0 +1,57 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from app.core.metrics import metrics
+
+
+def content_key(*parts: Any) -> str:
+    """Stable SHA-256 over JSON-serializable parts (prompt text, inputs, params...)."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls: the first caller for a key
+    starts the upstream call, everyone else arriving while it is in flight
+    awaits the same task and gets the same result (or exception).
+
+    The upstream call runs as its own task, so a caller disconnecting
+    does not cancel the work for the others still waiting on it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        self.calls = metrics.counter(f"singleflight.{name}.calls")
+        self.executions = metrics.counter(f"singleflight.{name}.executions")
+        self.coalesced = metrics.counter(f"singleflight.{name}.coalesced")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls.inc()
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced.inc()
+        else:
+            self.executions.inc()
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._done(k, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls.value,
+            "executions": self.executions.value,
+            "coalesced": self.coalesced.value,
+        }
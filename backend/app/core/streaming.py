@@ -0,0 +1,47 @@
+import json
+from typing import Any, AsyncIterator, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+# Helpers for incremental responses: NDJSON (one JSON document per line)
+# or Server-Sent Events (text/event-stream).
+
+STREAM_FORMATS = ("ndjson", "sse")
+
+
+def ndjson_line(data: Any) -> str:
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False) + "\n"
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    payload = data if isinstance(data, str) else json.dumps(jsonable_encoder(data), ensure_ascii=False)
+    lines = [f"event: {event}"] if event else []
+    # Multi-line payloads must be split into several data: fields
+    lines.extend(f"data: {line}" for line in payload.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+async def _encode(events: AsyncIterator, fmt: str):
+    async for event, data in events:
+        if fmt == "sse":
+            yield sse_event(data, event)
+        else:
+            yield ndjson_line({"event": event, "data": data} if event else data)
+
+
+def streaming_response(events: AsyncIterator, fmt: str = "ndjson") -> StreamingResponse:
+    """
+    Wraps an async iterator of (event_name, data) tuples.
+    For NDJSON, unnamed events (event_name=None) are written as the bare object.
+    """
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format '{fmt}'. Use one of: {', '.join(STREAM_FORMATS)}")
+
+    media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        _encode(events, fmt),
+        media_type=media_type,
+        # Stop reverse proxies (nginx, Render) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,89 @@
+import json
+from typing import Dict
+from starlette.exceptions import HTTPException
+
+
+def _too_large_detail(limit: int) -> str:
+    return f"Upload too large (limit is {limit / (1024 * 1024):.1f} MB)"
+
+
+class UploadTooLarge(HTTPException):
+    """
+    Raised from receive() once the body crosses the limit. An HTTPException so
+    FastAPI's form/body parsing re-raises it unchanged (anything else there
+    becomes a 400) and its exception handler answers 413.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=_too_large_detail(limit))
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Enforces a max request body size per path prefix while the body streams in.
+    Requests announcing a bigger Content-Length are rejected before any byte
+    is read; chunked uploads are cut off as soon as they cross the limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        # Longest prefix wins
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def _limit_for(self, path: str):
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") not in ("POST", "PUT"):
+            return await self.app(scope, receive, send)
+
+        limit = self._limit_for(scope["path"])
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            return await self._reject(send, limit)
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise UploadTooLarge(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except UploadTooLarge:
+            # Only reaches here when read outside FastAPI's handlers (e.g. by a
+            # streaming response already under way)
+            if response_started:
+                # Too late for a 413; drop the connection rather than finish the response
+                print(f"DEBUG: Upload to {scope['path']} crossed {limit} bytes after the response started")
+                return
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        body = json.dumps({"detail": _too_large_detail(limit)}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
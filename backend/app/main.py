@@ -1,26 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.core.config import settings
-from app.core.database import engine, Base
 from app.api.v1.endpoints import resume, jobs, interview
-from app.models.job import SavedJob  # Ensure model is registered before create_all
-from app.models.interview import InterviewSession  # Ensure interview model is registered
 
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.upload_limits import UploadSizeLimitMiddleware
 
-# Create Tables with Error Handling
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    print(f"❌ Database Connection Error: {e}")
-    if "Network is unreachable" in str(e):
-        print("\n⚠️  RENDER/SUPABASE CONFIGURATION ISSUE DETECTED ⚠️")
-        print("It appears you are connecting to Supabase via IPv6, which Render does not fully support.")
-        print("👉 SOLUTION: Update your DATABASE_URL in Render to use the 'Connection Pooler' string.")
-        print("   Shape: postgresql://[user]:[pass]@[aws-region].pooler.supabase.com:6543/[db]")
-        print("   Find it in: Supabase Dashboard > Project Settings > Database > Connection String > Pooler\n")
-    raise e
-
-app = FastAPI(title="CareerSync API")
+# Importing this module has no side effects: nothing connects to the DB or
+# Gemini, and PyMuPDF / the Gemini SDK load on first use. Tables are created
+# when the app starts (see lifespan below), or by scripts/init_db.py at deploy time.
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # --- Startup ---
+    if settings.DB_CREATE_TABLES_ON_STARTUP:
+        from app.core.database import init_schema
+        await init_schema()
+
+    from app.services import interview_bank
+    interview_bank.warm()
+
+    yield
+
+    # --- Shutdown (engine disposed last) ---
+    from app.services.job_providers import close_http_client
+    from app.services.resume_service import shutdown_pdf_pool
+    from app.services.batch_service import shutdown_batch_workers
+    from app.core.database import async_engine, cancel_schema_retries
+    cancel_schema_retries()
+    interview_bank.shutdown()
+    await shutdown_batch_workers()
+    await close_http_client()
+    shutdown_pdf_pool()
+    await async_engine.dispose()
+
+app = FastAPI(title="CareerSync API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -29,6 +43,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination cursor for /jobs/saved and /resume/history
+)
+
+# Reject oversized resume uploads while they stream in (PDF cap + room for form fields)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/v1/resume": settings.PDF_MAX_BYTES + 64 * 1024,
+        "/api/v1/resume/batch": settings.BATCH_MAX_UPLOAD_BYTES,
+        "/api/v1/jobs/search-by-resume": settings.PDF_MAX_BYTES + 64 * 1024,
+    },
 )
 
 # Include Routers
@@ -40,6 +65,11 @@ app.include_router(interview.router, prefix="/api/v1/interview", tags=["Intervie
 def root():
     return {"message": "CareerSync Backend Running 🚀"}
 
+@app.get("/metrics")
+def get_metrics():
+    from app.core.metrics import metrics
+    return metrics.snapshot()
+
 @app.get("/test-email")
 async def test_email_endpoint():
     try:
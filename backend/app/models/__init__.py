@@ -1,5 +1,6 @@
-from app.models.resume import ResumeAnalysis
-from app.models.job import SavedJob
-from app.models.interview import InterviewSession
+from app.models.resume import ResumeAnalysis, ResumeCacheEntry, ParsedResume
+from app.models.job import SavedJob, Job
+from app.models.interview import InterviewSession, InterviewMessage
+from app.models.batch import ResumeBatch, ResumeBatchItem
 
-__all__ = ["ResumeAnalysis", "SavedJob", "InterviewSession"]
+__all__ = ["ResumeAnalysis", "ResumeCacheEntry", "ParsedResume", "SavedJob", "Job", "InterviewSession", "InterviewMessage", "ResumeBatch", "ResumeBatchItem"]
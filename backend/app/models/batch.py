@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ResumeBatch(Base):
+    """
+    A bulk analysis submitted to /resume/batch. The worker process that took
+    the upload runs it and writes item state here, so any API worker can
+    answer /batch/{batch_id}.
+    """
+    __tablename__ = "resume_batches"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    email = Column(String, nullable=False)
+    job_role = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+
+class ResumeBatchItem(Base):
+    __tablename__ = "resume_batch_items"
+
+    batch_id = Column(String(32), ForeignKey("resume_batches.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)  # Order within the upload
+    filename = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # queued | processing | saving | done | failed
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    resume_id = Column(Integer, nullable=True)  # resumes.id once committed
+    parsed_resume_id = Column(String(64), nullable=True)
+    ats_score = Column(Integer, nullable=True)
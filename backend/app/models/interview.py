@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -10,7 +11,31 @@ class InterviewSession(Base):
     job_role = Column(String)
     difficulty = Column(String) # "Easy", "Medium", "Hard"
     
-    # Stores list of messages: [{"role": "ai", "content": "..."}, {"role": "user", "content": "..."}]
-    history = Column(JSON, default=[]) 
+    # Legacy: list of messages [{"role": "ai", "content": "..."}, ...].
+    # No longer written; messages live in interview_messages (see scripts/migrate_interview_messages.py)
+    history = deferred(Column(JSON, default=[]))
+
+    # Highest seq in interview_messages; bumped with UPDATE ... RETURNING to allocate seqs
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Rolling context: messages up to summarized_through are folded into
+    # summary / score_sheet and no longer sent to Gemini verbatim
+    summary = Column(Text, nullable=True)
+    score_sheet = Column(JSON, nullable=True)  # [{"topic": "...", "score": 1-10, "note": "..."}]
+    summarized_through = Column(Integer, nullable=False, default=0, server_default="0")
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class InterviewMessage(Base):
+    """One chat message; a turn appends two rows instead of rewriting the session."""
+    __tablename__ = "interview_messages"
+    __table_args__ = (UniqueConstraint("session_id", "seq", name="uq_interview_messages_session_seq"),)
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("interview_sessions.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(Integer, nullable=False)  # 1-based, per session
+    role = Column(String, nullable=False)  # "ai" | "user"
+    content = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)  # AI messages: input tokens of the call that produced it
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
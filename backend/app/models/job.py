@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, DDL, Index, event
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, CreatedAt
 
 class SavedJob(Base):
     __tablename__ = "saved_jobs"
+    __table_args__ = (
+        # One row per (user, title, company): saves are INSERT ... ON CONFLICT DO NOTHING
+        Index("uq_saved_jobs_user_title_company", "user_email", "title", "company_name", unique=True),
+        # Keyset listing: WHERE user_email = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index("ix_saved_jobs_user_created", "user_email", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_email = Column(String, index=True)
@@ -12,4 +18,64 @@ class SavedJob(Base):
     location = Column(String)
     apply_link = Column(String)
     platform = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(CreatedAt, server_default=func.now())
+
+
+class Job(Base):
+    """
+    Local corpus of every job seen from SerpAPI, deduplicated on SerpAPI's job_id.
+    Full-text search is added per dialect below (tsvector + GIN on Postgres, FTS5 on SQLite).
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True, nullable=False)
+    title = Column(String)
+    company_name = Column(String)
+    location = Column(String)
+    description = Column(Text)
+    salary = Column(String)
+    job_type = Column(String)
+    thumbnail = Column(String)
+    posted_at = Column(String)  # As shown by Google Jobs, e.g. "3 days ago"
+    posted_on = Column(DateTime(timezone=True), nullable=True, index=True)  # posted_at resolved when last seen
+    apply_link = Column(String)
+    platform = Column(String)
+    is_verified = Column(Boolean, default=False)
+    first_seen = Column(DateTime(timezone=True), server_default=func.now())
+    last_seen = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+# --- Full-text index (created alongside the table) ---
+
+# Postgres: generated tsvector column with a GIN index
+event.listen(Job.__table__, "after_create", DDL("""
+    ALTER TABLE jobs ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(company_name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+""").execute_if(dialect="postgresql"))
+event.listen(Job.__table__, "after_create", DDL(
+    "CREATE INDEX ix_jobs_search_vector ON jobs USING GIN (search_vector)"
+).execute_if(dialect="postgresql"))
+
+# SQLite: external-content FTS5 table kept in sync by triggers
+for statement in (
+    "CREATE VIRTUAL TABLE jobs_fts USING fts5(title, company_name, description, content='jobs', content_rowid='id')",
+    """CREATE TRIGGER jobs_fts_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts(rowid, title, company_name, description)
+        VALUES (new.id, new.title, new.company_name, new.description);
+    END""",
+    """CREATE TRIGGER jobs_fts_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company_name, description)
+        VALUES ('delete', old.id, old.title, old.company_name, old.description);
+    END""",
+    """CREATE TRIGGER jobs_fts_au AFTER UPDATE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company_name, description)
+        VALUES ('delete', old.id, old.title, old.company_name, old.description);
+        INSERT INTO jobs_fts(rowid, title, company_name, description)
+        VALUES (new.id, new.title, new.company_name, new.description);
+    END""",
+):
+    event.listen(Job.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
@@ -1,20 +1,102 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime
+import secrets
+import zlib
+from typing import Optional
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Float, Index, LargeBinary
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, CreatedAt
 
 class ResumeAnalysis(Base):
     __tablename__ = "resumes"
+    __table_args__ = (
+        # Resume history: WHERE email = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index("ix_resumes_email_created", "email", "created_at", "id"),
+        Index("uq_resumes_public_id", "public_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    # What clients use to open an analysis ("analysis_id"): random, so analyses
+    # cannot be enumerated the way the sequential id can
+    public_id = Column(String(32), nullable=True, default=lambda: new_public_id())
     email = Column(String, index=True, nullable=False)
     job_role = Column(String, nullable=False)
 
     # AI Analysis Results
     ats_score = Column(Integer, default=0)
 
+    created_at = Column(CreatedAt, server_default=func.now())
+
+    # The heavy columns are deferred: listings and lookups only load them when
+    # asked to (undefer(...) or `await row.awaitable_attrs.<name>`).
+
+    # We store the raw text extracted from PDF, zlib-compressed UTF-8. Rows
+    # written before compression keep it in the plain `raw_text` column until
+    # scripts/migrate_resumes.py moves it over.
+    raw_text_z = deferred(Column(LargeBinary, nullable=True))
+    raw_text_plain = deferred(Column("raw_text", Text, nullable=True))
+
+    analysis_json = deferred(Column(JSON, nullable=True)) # Full AI output
+
+    @property
+    def raw_text(self) -> Optional[str]:
+        """Decompressed resume text (the raw_text_* columns must be loaded)."""
+        return decompress_text(self.raw_text_z) if self.raw_text_z is not None else self.raw_text_plain
+
+    @raw_text.setter
+    def raw_text(self, text: Optional[str]):
+        self.raw_text_z = compress_text(text)
+        self.raw_text_plain = None
+
+
+def new_public_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    return zlib.compress(text.encode("utf-8")) if text is not None else None
+
+
+def decompress_text(data: Optional[bytes]) -> Optional[str]:
+    return zlib.decompress(data).decode("utf-8") if data is not None else None
+
+
+class ResumeCacheEntry(Base):
+    """
+    Content-addressed cache for resume processing.
+    key examples: "pdf_text:<sha256 of PDF bytes>:<text version>",
+                  "analysis:<sha256 of text>:<job role>:<prompt version>"
+    """
+    __tablename__ = "resume_cache"
+
+    key = Column(String, primary_key=True)
+    kind = Column(String, index=True, nullable=False)  # pdf_text | analysis | search_params
+    value = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ParsedResume(Base):
+    """
+    Parse-once artifact for an uploaded PDF, shared by /resume/analyze and
+    /jobs/search-by-resume. Rows are keyed by the SHA-256 of the PDF bytes,
+    which is also the parsed_resume_id clients pass back (the integer id is
+    never exposed), and re-parsed when parser_version changes.
+    """
+    __tablename__ = "parsed_resumes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, nullable=False)
+    parser_version = Column(String, nullable=False)
+
+    raw_text = Column(Text, nullable=False)
+    sections = Column(JSON, nullable=False)  # {"skills": "...", "experience": "...", ...}
+    skills = Column(JSON, nullable=False)    # Canonical skill names, most relevant first
+    titles = Column(JSON, nullable=False)    # Job titles mentioned, most relevant first
+    years_of_experience = Column(Float, nullable=True)
+
+    # Same shape as extract_search_params_from_resume. Filled at parse time when
+    # the local extractor is confident, otherwise on the first resume search.
+    search_params = Column(JSON, nullable=True)
+    search_params_source = Column(String, nullable=True)  # local | gemini
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    
-    # We store the raw text extracted from PDF
-    raw_text = Column(Text, nullable=True)     
-    
-    analysis_json = Column(JSON, nullable=True) # Full AI output
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,471 @@
+import asyncio
+import io
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete, or_, select, update
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.models.batch import ResumeBatch, ResumeBatchItem
+from app.models.resume import ResumeAnalysis
+from app.services.parsed_resume_service import parse_resume_upload
+from app.services.llm_gateway import BULK
+from app.services.resume_service import AnalysisQuotaExceeded, analyze_resume_with_llm
+
+FINAL_STATUSES = ("done", "failed")
+
+_queue_depth = metrics.gauge("batch.queue_depth")
+_items_done = metrics.counter("batch.items_done")
+_items_failed = metrics.counter("batch.items_failed")
+_commit_size = metrics.histogram("batch.commit_size", buckets=(1, 5, 10, 25, 50, 100))
+
+
+# ==========================================
+# BATCH STATE
+# ==========================================
+# The worker process that accepted the upload runs the batch and keeps its
+# live state in memory (streams there are event driven). Item state is also
+# written to resume_batch_items by the commit loop, so a batch can be polled
+# or streamed from any API worker until BATCH_RETENTION_SECONDS after it
+# finishes.
+class BatchItem:
+    """One PDF of a batch: queued -> processing -> saving -> done | failed."""
+
+    def __init__(self, index: int, filename: str):
+        self.index = index
+        self.filename = filename
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.id: Optional[int] = None          # resumes.id once committed
+        self.parsed_resume_id: Optional[str] = None
+        self.ats_score: Optional[int] = None
+        self.analysis: Optional[Dict] = None
+        self.persisted: Optional[Dict] = None  # state() as last written to the DB
+
+    def state(self) -> Dict:
+        """The resume_batch_items columns that change while the batch runs."""
+        return {
+            "status": self.status,
+            "error": self.error,
+            "attempts": self.attempts,
+            "resume_id": self.id,
+            "parsed_resume_id": self.parsed_resume_id,
+            "ats_score": self.ats_score,
+        }
+
+    def to_dict(self, include_analysis: bool = False) -> Dict:
+        data = {
+            "index": self.index,
+            "filename": self.filename,
+            "status": self.status,
+            "error": self.error,
+            "id": self.id,
+            "parsed_resume_id": self.parsed_resume_id,
+            "ats_score": self.ats_score,
+        }
+        if include_analysis:
+            data["analysis_json"] = self.analysis
+        return data
+
+
+class Batch:
+    def __init__(self, email: str, job_role: str):
+        self.id = uuid.uuid4().hex
+        self.email = email
+        self.job_role = job_role
+        self.items: List[BatchItem] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.local = True  # False for snapshots loaded from the DB (see load_batch)
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return all(item.status in FINAL_STATUSES for item in self.items)
+
+    def notify(self):
+        """Wakes every watcher; called after any item changes status."""
+        if self.finished_at is None and self.finished:
+            self.finished_at = time.time()
+        _dirty.add(self)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    @property
+    def changed(self) -> asyncio.Event:
+        """Set on the next notify(); grab it before reading item state."""
+        return self._changed
+
+    def summary(self) -> Dict:
+        counts = {status: 0 for status in ("queued", "processing", "saving", "done", "failed")}
+        for item in self.items:
+            counts[item.status] += 1
+        return {
+            "batch_id": self.id,
+            "job_role": self.job_role,
+            "total": len(self.items),
+            "counts": counts,
+            "finished": self.finished,
+        }
+
+
+_batches: Dict[str, Batch] = {}
+_dirty: Set[Batch] = set()  # Batches with item state not yet written to the DB
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_committer: Optional[asyncio.Task] = None
+_pending: List[Tuple[Batch, BatchItem, Dict]] = []  # Analysed, waiting for the next commit
+_flush_now: Optional[asyncio.Event] = None
+
+
+async def _purge_expired():
+    cutoff = time.time() - settings.BATCH_RETENTION_SECONDS
+    for batch_id in [b.id for b in _batches.values() if b.finished_at and b.finished_at < cutoff]:
+        del _batches[batch_id]
+
+    finished_before = datetime.fromtimestamp(cutoff, timezone.utc)
+    # Unfinished batches this old were left behind by a worker that died
+    abandoned_before = datetime.fromtimestamp(cutoff - 3 * settings.BATCH_RETENTION_SECONDS, timezone.utc)
+    expired = select(ResumeBatch.id).where(or_(
+        ResumeBatch.finished_at < finished_before, ResumeBatch.created_at < abandoned_before
+    ))
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(ResumeBatchItem).where(ResumeBatchItem.batch_id.in_(expired)))
+        await db.execute(delete(ResumeBatch).where(ResumeBatch.id.in_(expired)))
+        await db.commit()
+
+
+def get_batch(batch_id: str) -> Optional[Batch]:
+    """The live batch, if this process is running it."""
+    return _batches.get(batch_id)
+
+
+async def load_batch(batch_id: str, include_analysis: bool = False) -> Optional[Batch]:
+    """The live batch, or a read-only snapshot from the DB when another worker process runs it."""
+    batch = _batches.get(batch_id)
+    if batch is not None:
+        return batch
+
+    async with AsyncSessionLocal() as db:
+        row = await db.get(ResumeBatch, batch_id)
+        if row is None:
+            return None
+        item_rows = (await db.execute(
+            select(ResumeBatchItem).where(ResumeBatchItem.batch_id == batch_id).order_by(ResumeBatchItem.position)
+        )).scalars().all()
+        analyses = {}
+        resume_ids = [item.resume_id for item in item_rows if item.resume_id is not None]
+        if include_analysis and resume_ids:
+            analyses = dict((await db.execute(
+                select(ResumeAnalysis.id, ResumeAnalysis.analysis_json).where(ResumeAnalysis.id.in_(resume_ids))
+            )).all())
+
+    batch = Batch(row.email, row.job_role)
+    batch.id, batch.local = row.id, False
+    batch.finished_at = row.finished_at.timestamp() if row.finished_at else None
+    for item_row in item_rows:
+        item = BatchItem(item_row.position, item_row.filename)
+        item.status, item.error, item.attempts = item_row.status, item_row.error, item_row.attempts
+        item.id, item.parsed_resume_id, item.ats_score = item_row.resume_id, item_row.parsed_resume_id, item_row.ats_score
+        item.analysis = analyses.get(item_row.resume_id)
+        batch.items.append(item)
+    return batch
+
+
+async def _persist_states():
+    """Writes item state that changed since the last call (one UPDATE per changed item, one commit)."""
+    if not _dirty:
+        return
+    batches = list(_dirty)
+    _dirty.clear()
+
+    written = []
+    rows = []
+    for batch in batches:
+        for item in batch.items:
+            state = item.state()
+            if state != item.persisted:
+                written.append((item, state))
+                rows.append(dict(state, batch_id=batch.id, position=item.index))
+    try:
+        async with AsyncSessionLocal() as db:
+            if rows:
+                await db.execute(update(ResumeBatchItem), rows)
+            for batch in batches:
+                if batch.finished_at is not None:
+                    await db.execute(
+                        update(ResumeBatch)
+                        .where(ResumeBatch.id == batch.id, ResumeBatch.finished_at.is_(None))
+                        .values(finished_at=datetime.fromtimestamp(batch.finished_at, timezone.utc))
+                    )
+            await db.commit()
+    except Exception as e:
+        print(f"DEBUG: Saving batch state failed: {str(e)}")
+        _dirty.update(batches)  # Retried on the next tick
+        return
+    for item, state in written:
+        item.persisted = state
+
+
+# ==========================================
+# UPLOAD EXPANSION (PDFs and zips of PDFs)
+# ==========================================
+def expand_uploads(uploads: List[Tuple[str, str, bytes]]) -> Tuple[List[Tuple[str, bytes]], List[Tuple[str, str]]]:
+    """
+    Takes (filename, content_type, bytes) uploads and returns (pdfs, rejected):
+    pdfs as (filename, bytes), zip members included; rejected as (filename, reason).
+    Raises ValueError past BATCH_MAX_FILES, or once the PDFs would add up to more
+    than BATCH_MAX_INFLATED_BYTES (they stay in memory until analysed).
+    Blocking (zip inflation), so run it in a thread.
+    """
+    pdfs: List[Tuple[str, bytes]] = []
+    rejected: List[Tuple[str, str]] = []
+    total_bytes = 0
+
+    def reserve(size: int):
+        nonlocal total_bytes
+        total_bytes += size
+        if total_bytes > settings.BATCH_MAX_INFLATED_BYTES:
+            raise ValueError(f"Batch is larger than {settings.BATCH_MAX_INFLATED_BYTES} bytes once unzipped")
+
+    for filename, content_type, content in uploads:
+        name = filename or "upload"
+        if content.startswith(b"PK\x03\x04") or name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(content))
+            except zipfile.BadZipFile:
+                rejected.append((name, "Not a valid zip file"))
+                continue
+            with archive:
+                for member in archive.infolist():
+                    member_name = f"{name}/{member.filename}"
+                    if member.is_dir() or member.filename.startswith("__MACOSX/"):
+                        continue
+                    if not member.filename.lower().endswith(".pdf"):
+                        rejected.append((member_name, "Only PDF files allowed"))
+                    elif member.file_size > settings.PDF_MAX_BYTES:
+                        # Declared size is checked before inflating anything
+                        rejected.append((member_name, f"PDF is larger than {settings.PDF_MAX_BYTES} bytes"))
+                    else:
+                        # Checked on the declared size; zipfile never inflates a member past it
+                        reserve(member.file_size)
+                        try:
+                            pdfs.append((member_name, archive.read(member)))
+                        except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError) as e:
+                            rejected.append((member_name, f"Could not unzip: {str(e)}"))
+                    if len(pdfs) + len(rejected) > settings.BATCH_MAX_FILES:
+                        # Stop inflating as soon as the batch is over the limit
+                        raise ValueError(f"Too many files in one batch (limit is {settings.BATCH_MAX_FILES})")
+        elif content_type == "application/pdf" or name.lower().endswith(".pdf"):
+            reserve(len(content))
+            pdfs.append((name, content))
+        else:
+            rejected.append((name, "Only PDF files allowed"))
+
+    return pdfs, rejected
+
+
+# ==========================================
+# QUEUE + WORKERS
+# ==========================================
+def _ensure_workers():
+    global _queue, _committer, _flush_now
+    if _queue is not None and _workers and not any(task.done() for task in _workers):
+        return
+    _queue = asyncio.Queue()
+    _flush_now = asyncio.Event()
+    _workers[:] = [asyncio.ensure_future(_worker()) for _ in range(settings.BATCH_WORKERS)]
+    _committer = asyncio.ensure_future(_commit_loop())
+    print(f"DEBUG: Started {settings.BATCH_WORKERS} batch analysis workers")
+
+
+async def submit_batch(email: str, job_role: str, pdfs: List[Tuple[str, bytes]], rejected: List[Tuple[str, str]]) -> Batch:
+    """Creates a batch (in memory and in the DB) and enqueues its PDFs. Rejected files are recorded as failed items."""
+    if len(pdfs) + len(rejected) > settings.BATCH_MAX_FILES:
+        raise ValueError(f"Too many files in one batch (limit is {settings.BATCH_MAX_FILES})")
+
+    await _purge_expired()
+    _ensure_workers()
+
+    batch = Batch(email, job_role)
+    for filename, reason in rejected:
+        item = BatchItem(len(batch.items), filename)
+        item.status, item.error = "failed", reason
+        batch.items.append(item)
+    for filename, _ in pdfs:
+        batch.items.append(BatchItem(len(batch.items), filename))
+
+    async with AsyncSessionLocal() as db:
+        db.add(ResumeBatch(id=batch.id, email=email, job_role=job_role))
+        await db.flush()  # The items reference the batch row
+        db.add_all([
+            ResumeBatchItem(batch_id=batch.id, position=item.index, filename=item.filename, **item.state())
+            for item in batch.items
+        ])
+        await db.commit()
+    for item in batch.items:
+        item.persisted = item.state()
+
+    _items_failed.inc(len(rejected))
+    for item, (_, content) in zip(batch.items[len(rejected):], pdfs):
+        _queue.put_nowait((batch, item, content))
+
+    _batches[batch.id] = batch
+    _queue_depth.set(_queue.qsize())
+    batch.notify()
+    print(f"DEBUG: Batch {batch.id}: {len(pdfs)} PDFs queued, {len(rejected)} rejected")
+    return batch
+
+
+def _fail(batch: Batch, item: BatchItem, error: str):
+    item.status, item.error = "failed", error
+    _items_failed.inc()
+    batch.notify()
+
+
+async def _process(batch: Batch, item: BatchItem, content: bytes):
+    item.status = "processing"
+    batch.notify()
+
+    parsed = await parse_resume_upload(content)
+    item.parsed_resume_id = parsed["parsed_resume_id"]
+
+    # The gateway already retries 429s and queues bulk calls behind interactive
+    # ones; this outer retry covers longer quota outages. The worker slot stays
+    # taken meanwhile, which slows the whole queue down while Gemini is throttling us
+    for attempt in range(1, settings.BATCH_MAX_ATTEMPTS + 1):
+        item.attempts = attempt
+        try:
+            analysis = await analyze_resume_with_llm(parsed["raw_text"], batch.job_role, lane=BULK)
+            break
+        except AnalysisQuotaExceeded:
+            if attempt == settings.BATCH_MAX_ATTEMPTS:
+                raise RuntimeError("Gemini quota exceeded, try again later")
+        await asyncio.sleep(2 ** attempt)
+
+    item.analysis = analysis
+    item.ats_score = analysis.get("ats_score", 0)
+    item.status = "saving"
+    batch.notify()
+
+    _pending.append((batch, item, {
+        "email": batch.email,
+        "job_role": batch.job_role,
+        "raw_text": parsed["raw_text"],
+        "ats_score": item.ats_score,
+        "analysis_json": analysis,
+    }))
+    if len(_pending) >= settings.BATCH_COMMIT_SIZE:
+        _flush_now.set()
+
+
+async def _worker():
+    while True:
+        batch, item, content = await _queue.get()
+        _queue_depth.set(_queue.qsize())
+        try:
+            await _process(batch, item, content)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"DEBUG: Batch {batch.id} item {item.index} ({item.filename}) failed: {str(e)}")
+            _fail(batch, item, str(e))
+        finally:
+            _queue.task_done()
+
+
+# ==========================================
+# BATCHED COMMITS TO `resumes`
+# ==========================================
+async def _insert_analyses(rows: List[Dict]) -> List[int]:
+    async with AsyncSessionLocal() as db:
+        records = [ResumeAnalysis(**row) for row in rows]
+        db.add_all(records)
+        await db.flush()
+        ids = [record.id for record in records]
+        await db.commit()
+        return ids
+
+
+async def _flush():
+    while _pending:
+        chunk = _pending[:settings.BATCH_COMMIT_SIZE]
+        del _pending[:len(chunk)]
+        try:
+            ids = await _insert_analyses([row for _, _, row in chunk])
+        except Exception as e:
+            print(f"DEBUG: Batch commit of {len(chunk)} analyses failed: {str(e)}")
+            for batch, item, _ in chunk:
+                _fail(batch, item, f"Database save failed: {str(e)}")
+            continue
+
+        _commit_size.observe(len(chunk))
+        for (batch, item, _), resume_id in zip(chunk, ids):
+            item.id, item.status = resume_id, "done"
+            _items_done.inc()
+        for batch in {id(batch): batch for batch, _, _ in chunk}.values():
+            batch.notify()
+
+
+async def _commit_loop():
+    """Commits whatever is pending every BATCH_COMMIT_INTERVAL, or as soon as a full chunk is ready."""
+    while True:
+        try:
+            await asyncio.wait_for(_flush_now.wait(), timeout=settings.BATCH_COMMIT_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _flush_now.clear()
+        await _flush()
+        await _persist_states()
+
+
+async def shutdown_batch_workers():
+    """Stops the workers and commits finished analyses. Still-queued items are dropped."""
+    global _queue, _committer
+    for task in _workers + ([_committer] if _committer else []):
+        task.cancel()
+    _workers.clear()
+    _queue, _committer = None, None
+    await _flush()
+    await _persist_states()
+
+
+async def watch_batch(batch: Batch, heartbeat: float = 15.0) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Status events for streaming: ("item", ...) whenever an item changes status,
+    ("progress", summary) as a heartbeat, and a final ("done", summary).
+    A batch run by another worker process is re-read from the DB every
+    BATCH_COMMIT_INTERVAL seconds instead.
+    """
+    loop = asyncio.get_running_loop()
+    sent: Dict[int, str] = {}
+    last_sent = loop.time()
+    while True:
+        event = batch.changed
+        changed = False
+        for item in batch.items:
+            if sent.get(item.index) != item.status:
+                sent[item.index] = item.status
+                changed = True
+                yield "item", item.to_dict()
+        if batch.finished:
+            yield "done", batch.summary()
+            return
+        if changed:
+            last_sent = loop.time()
+        elif loop.time() - last_sent >= heartbeat:
+            last_sent = loop.time()
+            yield "progress", batch.summary()
+
+        if batch.local:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(settings.BATCH_COMMIT_INTERVAL)
+            batch = await load_batch(batch.id) or batch
@@ -0,0 +1,143 @@
+import asyncio
+import re
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services import llm_gateway
+from app.services.interview_service import request_interview_response
+
+# The first interview message only depends on (role, difficulty), so a few are
+# generated ahead of time and /interview/start just takes one. The bank is per
+# process; a cold (role, difficulty) falls back to live generation. Only roles
+# in INTERVIEW_BANK_WARM_ROLES, or asked for more than once, are filled to
+# INTERVIEW_BANK_DEPTH; for a one-off free-text role the bank just keeps the
+# live opening, so a typo never costs a round of Gemini calls.
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+_ROLE_CLEAN_RE = re.compile(r"[^a-z0-9+#./ ]+")
+
+_hits = metrics.counter("interview_bank.hits")
+_misses = metrics.counter("interview_bank.misses")
+_generated = metrics.counter("interview_bank.generated")
+_refill_errors = metrics.counter("interview_bank.refill_errors")
+
+
+class _Slot:
+    def __init__(self, job_role: str, difficulty: str):
+        # The first spelling seen is the one the openings are generated for
+        self.job_role = job_role
+        self.difficulty = difficulty
+        self.openings: Deque[str] = deque()
+        self.refilling = False
+        self.warm = False  # Listed in INTERVIEW_BANK_WARM_ROLES
+        self.requests = 0
+
+    @property
+    def depth(self) -> int:
+        """Openings worth keeping ready for this slot."""
+        return settings.INTERVIEW_BANK_DEPTH if self.warm or self.requests > 1 else 1
+
+
+_bank: "OrderedDict[Tuple[str, str], _Slot]" = OrderedDict()
+_tasks = set()
+
+
+def bank_key(job_role: str, difficulty: str) -> Tuple[str, str]:
+    role = " ".join(_ROLE_CLEAN_RE.sub(" ", job_role.lower()).split())
+    return role, (difficulty or "Medium").strip().lower()
+
+
+def _slot(job_role: str, difficulty: str) -> _Slot:
+    key = bank_key(job_role, difficulty)
+    slot = _bank.get(key)
+    if slot is None:
+        slot = _bank[key] = _Slot(job_role.strip(), difficulty)
+        while len(_bank) > settings.INTERVIEW_BANK_MAX_ROLES:
+            _bank.popitem(last=False)
+    else:
+        _bank.move_to_end(key)
+    return slot
+
+
+async def _refill(slot: _Slot, rotate: Optional[str] = None):
+    """
+    Tops the slot up to its depth on the bulk lane, so it never
+    delays live turns. If generation fails (or only repeats itself), the opening
+    just served (rotate) goes back to the end of the queue, keeping the bank warm.
+    """
+    try:
+        attempts = 0
+        while len(slot.openings) < slot.depth and attempts < 2 * slot.depth:
+            attempts += 1
+            opening = (await request_interview_response(
+                [], slot.job_role, slot.difficulty, lane=llm_gateway.BULK, dedupe=False
+            )).content
+            _generated.inc()
+            # Duplicates (Gemini repeating itself) are dropped to keep rotation varied
+            if opening and opening != rotate and opening not in slot.openings:
+                slot.openings.append(opening)
+    except Exception as e:
+        _refill_errors.inc()
+        print(f"DEBUG: Interview bank refill failed for {slot.job_role} ({slot.difficulty}): {str(e)}")
+    finally:
+        if rotate is not None and len(slot.openings) < slot.depth and rotate not in slot.openings:
+            slot.openings.append(rotate)
+        slot.refilling = False
+
+
+def _schedule_refill(slot: _Slot, rotate: Optional[str] = None):
+    if slot.refilling:
+        if rotate is not None:
+            # A refill is already running; rotate the served opening regardless
+            slot.openings.append(rotate)
+        return
+    slot.refilling = True
+    task = asyncio.create_task(_refill(slot, rotate))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def take_opening(job_role: str, difficulty: str) -> Optional[str]:
+    """
+    A pre-generated first message, or None when this (role, difficulty) is cold.
+    After a miss, hand the live opening to keep_opening.
+    """
+    slot = _slot(job_role, difficulty)
+    slot.requests += 1
+    if not slot.openings:
+        _misses.inc()
+        if slot.depth > 1:
+            _schedule_refill(slot)
+        return None
+    _hits.inc()
+    opening = slot.openings.popleft()
+    _schedule_refill(slot, rotate=opening)
+    return opening
+
+
+def keep_opening(job_role: str, difficulty: str, opening: str):
+    """Banks an opening generated live after a miss, so the next candidate gets it."""
+    slot = _slot(job_role, difficulty)
+    if opening and len(slot.openings) < slot.depth and opening not in slot.openings:
+        slot.openings.append(opening)
+
+
+def warm(roles: str = None):
+    """Starts filling the bank for a comma separated list of roles (every difficulty)."""
+    for role in (r.strip() for r in (roles if roles is not None else settings.INTERVIEW_BANK_WARM_ROLES).split(",")):
+        if role:
+            for difficulty in DIFFICULTIES:
+                slot = _slot(role, difficulty)
+                slot.warm = True
+                _schedule_refill(slot)
+
+
+def shutdown():
+    for task in list(_tasks):
+        task.cancel()
+
+
+def stats() -> Dict:
+    return {f"{role}|{difficulty}": len(slot.openings) for (role, difficulty), slot in _bank.items()}
@@ -0,0 +1,101 @@
+from typing import Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.models.interview import InterviewSession
+from app.services.interview_message_service import load_messages, load_recent_messages, save_summary
+from app.services.interview_service import summarize_turns
+
+# Keeps interview prompts roughly constant in size: Gemini sees the running
+# summary + score sheet and only the last INTERVIEW_VERBATIM_TURNS turns
+# verbatim. Once INTERVIEW_SUMMARY_EVERY more turns have piled up behind that
+# window, they are folded into the summary in the background.
+
+_folds = metrics.counter("interview.summary.folds")
+_fold_errors = metrics.counter("interview.summary.errors")
+
+_folding = set()  # Session ids with a fold in flight in this process
+
+
+def _window() -> int:
+    """Most unsummarized messages sent verbatim: the question before the kept turns, then 2 per turn."""
+    return 2 * (settings.INTERVIEW_VERBATIM_TURNS + settings.INTERVIEW_SUMMARY_EVERY) + 1
+
+
+async def load_context(db: AsyncSession, session: InterviewSession) -> Dict:
+    """
+    What the next turn is generated from: {"summary", "score_sheet", "history"}.
+    history is capped at the window even if folding has fallen behind.
+    """
+    messages = await load_recent_messages(db, session.id, session.summarized_through, _window())
+    return {
+        "summary": session.summary,
+        "score_sheet": session.score_sheet,
+        "history": [{"role": m["role"], "content": m["content"]} for m in messages],
+    }
+
+
+def needs_fold(message_count: int, summarized_through: int) -> bool:
+    return message_count - summarized_through > _window()
+
+
+def _fold_target(messages) -> Optional[int]:
+    """
+    Last seq to fold so the kept messages are INTERVIEW_VERBATIM_TURNS turns
+    plus the question they answer (i.e. they start with an AI message).
+    """
+    keep = 2 * settings.INTERVIEW_VERBATIM_TURNS + 1
+    if len(messages) <= keep:
+        return None
+    cut = len(messages) - keep
+    while cut > 0 and messages[cut]["role"] == "user":
+        cut -= 1
+    return messages[cut - 1]["seq"] if cut > 0 else None
+
+
+async def _load_unsummarized(session_id: int) -> Optional[Dict]:
+    async with AsyncSessionLocal() as db:
+        session = await db.get(InterviewSession, session_id)
+        if session is None:
+            return None
+        return {
+            "job_role": session.job_role,
+            "difficulty": session.difficulty,
+            "summary": session.summary,
+            "score_sheet": session.score_sheet,
+            "summarized_through": session.summarized_through,
+            "messages": await load_messages(db, session_id, session.summarized_through),
+        }
+
+
+async def fold_history(session_id: int):
+    """
+    Folds the turns that fell out of the verbatim window into the session's
+    summary. Run as a background task after /chat responds; on failure the
+    summary just stays behind and the next turn tries again.
+    """
+    if session_id in _folding:
+        return
+    _folding.add(session_id)
+    try:
+        state = await _load_unsummarized(session_id)
+        if state is None:
+            return
+        through = _fold_target(state["messages"])
+        if through is None:
+            return
+        folded = [m for m in state["messages"] if m["seq"] <= through]
+        summary, score_sheet = await summarize_turns(
+            state["job_role"], state["difficulty"], state["summary"], state["score_sheet"], folded
+        )
+        async with AsyncSessionLocal() as db:
+            saved = await save_summary(db, session_id, state["summarized_through"], through, summary, score_sheet)
+        if saved:
+            _folds.inc()
+            print(f"DEBUG: Interview {session_id}: folded messages {folded[0]['seq']}-{through} into the summary")
+    except Exception as e:
+        _fold_errors.inc()
+        print(f"DEBUG: Interview {session_id}: summary update failed: {str(e)}")
+    finally:
+        _folding.discard(session_id)
@@ -0,0 +1,178 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.interview import InterviewSession, InterviewMessage
+
+# Interview messages are append-only rows keyed by (session_id, seq).
+# seqs are allocated by bumping interview_sessions.message_count with
+# UPDATE ... RETURNING, so concurrent turns on one session never collide
+# and never overwrite each other.
+
+
+def _insert_messages_stmt(session_id: int, first_seq: int, messages: List[Tuple]):
+    """(INSERT, rows) for (role, content) or (role, content, prompt_tokens) messages."""
+    return InterviewMessage.__table__.insert(), [
+        {
+            "session_id": session_id,
+            "seq": first_seq + offset,
+            "role": message[0],
+            "content": message[1],
+            "prompt_tokens": message[2] if len(message) > 2 else None,
+        }
+        for offset, message in enumerate(messages)
+    ]
+
+
+async def create_session(db: AsyncSession, user_email: str, job_role: str, difficulty: str, opening: str, prompt_tokens: Optional[int] = None) -> int:
+    """Inserts a session with its first AI message and commits. Returns the session id."""
+    session = InterviewSession(
+        user_email=user_email,
+        job_role=job_role,
+        difficulty=difficulty,
+        history=[],
+        message_count=1,
+    )
+    db.add(session)
+    await db.flush()  # INSERT ... RETURNING id, so no refresh after the commit
+    session_id = session.id
+    await db.execute(*_insert_messages_stmt(session_id, 1, [("ai", opening, prompt_tokens)]))
+    await db.commit()
+    return session_id
+
+
+async def append_messages(db: AsyncSession, session_id: int, messages: List[Tuple]) -> int:
+    """Appends (role, content[, prompt_tokens]) messages in order and commits. Returns the first seq used."""
+    new_count = (await db.execute(
+        update(InterviewSession)
+        .where(InterviewSession.id == session_id)
+        .values(message_count=InterviewSession.message_count + len(messages))
+        .returning(InterviewSession.message_count)
+    )).scalar_one()
+    first_seq = new_count - len(messages) + 1
+    await db.execute(*_insert_messages_stmt(session_id, first_seq, messages))
+    await db.commit()
+    return first_seq
+
+
+# ==========================================
+# LEGACY HISTORY BACKFILL
+# ==========================================
+def _backfill_plan(session_id: int, history: Optional[list]):
+    """(claim UPDATE, messages) for copying a legacy JSON history, or None if it is empty."""
+    if not history:
+        return None
+    history = [m for m in history if m.get("content") is not None]
+    claim = (
+        update(InterviewSession)
+        .where(InterviewSession.id == session_id, InterviewSession.message_count == 0)
+        .values(message_count=len(history))
+    )
+    return claim, [(m.get("role", "ai"), m["content"]) for m in history]
+
+
+async def backfill_from_history(db: AsyncSession, session: InterviewSession) -> bool:
+    """
+    Copies a legacy session's JSON history into interview_messages once.
+    Returns True if rows were written. Safe under concurrency: only the
+    caller whose UPDATE still sees message_count = 0 writes the rows.
+    """
+    if session.message_count:
+        return False
+    plan = _backfill_plan(session.id, await session.awaitable_attrs.history)
+    if plan is None:
+        return False
+    claim, messages = plan
+    if not (await db.execute(claim)).rowcount:
+        await db.rollback()
+        # The rollback expired `session`; reload it here, as attribute access
+        # can't lazy-load on an async session (MissingGreenlet)
+        await db.refresh(session)
+        return False
+    if messages:
+        await db.execute(*_insert_messages_stmt(session.id, 1, messages))
+    await db.commit()
+    return True
+
+
+def backfill_from_history_sync(db: Session, session: InterviewSession) -> bool:
+    """backfill_from_history for scripts on the sync engine."""
+    if session.message_count:
+        return False
+    plan = _backfill_plan(session.id, session.history)
+    if plan is None:
+        return False
+    claim, messages = plan
+    if not db.execute(claim).rowcount:
+        db.rollback()
+        return False
+    if messages:
+        db.execute(*_insert_messages_stmt(session.id, 1, messages))
+    db.commit()
+    return True
+
+
+# ==========================================
+# READS
+# ==========================================
+async def get_session(db: AsyncSession, session_id: int) -> Optional[InterviewSession]:
+    """Loads a session (history stays deferred), migrating legacy history on first access."""
+    session = await db.get(InterviewSession, session_id)
+    if session is not None and session.message_count == 0 and await backfill_from_history(db, session):
+        await db.refresh(session)
+    return session
+
+
+_MESSAGE_COLUMNS = (
+    InterviewMessage.seq,
+    InterviewMessage.role,
+    InterviewMessage.content,
+    InterviewMessage.prompt_tokens,
+    InterviewMessage.created_at,
+)
+
+
+def _to_dicts(rows) -> List[Dict]:
+    return [
+        {"seq": seq, "role": role, "content": content, "prompt_tokens": prompt_tokens, "created_at": created_at}
+        for seq, role, content, prompt_tokens, created_at in rows
+    ]
+
+
+async def load_messages(db: AsyncSession, session_id: int, after_seq: int = 0, limit: Optional[int] = None, through_seq: Optional[int] = None) -> List[Dict]:
+    """Messages with after_seq < seq [<= through_seq] in order (keyset pagination); all of them when limit is None."""
+    query = (
+        select(*_MESSAGE_COLUMNS)
+        .where(InterviewMessage.session_id == session_id, InterviewMessage.seq > after_seq)
+        .order_by(InterviewMessage.seq)
+    )
+    if through_seq is not None:
+        query = query.where(InterviewMessage.seq <= through_seq)
+    if limit is not None:
+        query = query.limit(limit)
+    return _to_dicts(await db.execute(query))
+
+
+async def load_recent_messages(db: AsyncSession, session_id: int, after_seq: int, limit: int) -> List[Dict]:
+    """The last `limit` messages with seq > after_seq, oldest first."""
+    rows = (await db.execute(
+        select(*_MESSAGE_COLUMNS)
+        .where(InterviewMessage.session_id == session_id, InterviewMessage.seq > after_seq)
+        .order_by(InterviewMessage.seq.desc())
+        .limit(limit)
+    )).all()
+    return _to_dicts(reversed(rows))
+
+
+async def save_summary(db: AsyncSession, session_id: int, expected_through: int, summarized_through: int, summary: str, score_sheet: list) -> bool:
+    """
+    Stores a new rolling summary and commits. Compare-and-set on summarized_through,
+    so two folds of the same turns cannot both land; returns False if this one lost.
+    """
+    updated = (await db.execute(
+        update(InterviewSession)
+        .where(InterviewSession.id == session_id, InterviewSession.summarized_through == expected_through)
+        .values(summary=summary, score_sheet=score_sheet, summarized_through=summarized_through)
+    )).rowcount
+    await db.commit()
+    return bool(updated)
@@ -1,23 +1,87 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from app.core.config import settings
+import json
+import re
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+from app.core.metrics import metrics
+from app.core.singleflight import content_key
+from app.services import llm_gateway
+from app.services.resume_text import estimate_tokens
 
-# Initialize Gemini
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=settings.GOOGLE_API_KEY,
-    temperature=0.3 # Slightly creative but focused
-)
+# langchain_core is imported where prompts are built, so importing the API
+# does not pay for it before the first interview turn
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+
+# Prompt size of each interview turn (Gemini's count, or an estimate when it reports none)
+_prompt_tokens = metrics.histogram("interview.prompt_tokens", buckets=llm_gateway.TOKEN_BUCKETS)
+
+
+class InterviewReply(NamedTuple):
+    content: str
+    prompt_tokens: Optional[int]
 
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 async def generate_interview_response(history: list, job_role: str, difficulty: str):
     """
     Takes the chat history and generates the next AI response.
+    Never raises: Gemini failures become a canned message that keeps the interview going.
     """
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""
+    reply = await generate_interview_turn(history, job_role, difficulty)
+    return reply.content
+
+async def generate_interview_turn(history: list, job_role: str, difficulty: str, summary: str = None, score_sheet: list = None) -> InterviewReply:
+    """
+    Like generate_interview_response, for a session whose older turns are folded
+    into summary / score_sheet; history is then only the recent turns.
+    """
+    try:
+        reply = await request_interview_response(history, job_role, difficulty, summary=summary, score_sheet=score_sheet)
+    except Exception as e:
+        print(f"DEBUG: LLM Call failed: {str(e)}")
+        # Provide a graceful fallback instead of crashing
+        return InterviewReply(_fallback_reply(job_role), None)
+
+    if not reply.content:
+        return InterviewReply(_empty_reply(job_role), reply.prompt_tokens)
+    return reply
+
+def _fallback_reply(job_role: str) -> str:
+    return f"**Feedback:** I'm having a slight technical synchronization issue.\n**Next Question:** Let's proceed. Could you explain another key concept related to {job_role}?"
+
+def _empty_reply(job_role: str) -> str:
+    return "**Feedback:** N/A\n**Next Question:** Let's get back to the interview. Could you tell me more about your technical experience with " + job_role + "?"
+
+def render_score_sheet(score_sheet: Optional[list]) -> str:
+    """One line per scored question, e.g. "- Indexes: 7/10 (missed covering indexes)"."""
+    lines = []
+    for entry in score_sheet or []:
+        line = f"- {entry.get('topic', 'Question')}: {entry.get('score', '?')}/10"
+        if entry.get("note"):
+            line += f" ({entry['note']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+def _context_prompt(summary: Optional[str], score_sheet: Optional[list]) -> str:
+    if not summary and not score_sheet:
+        return ""
+    return f"""
+
+        INTERVIEW SO FAR (earlier turns, summarized; the most recent turns follow verbatim):
+        {summary or "N/A"}
+
+        SCORE SHEET SO FAR:
+        {render_score_sheet(score_sheet) or "N/A"}
+
+        Do not repeat questions that were already asked.
+        """
+
+def _interview_prompt(job_role: str, difficulty: str, summary: Optional[str], score_sheet: Optional[list]) -> "ChatPromptTemplate":
+    from langchain_core.messages import SystemMessage
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    # A message object rather than a ("system", ...) template, so braces in the
+    # role or the summary are never read as template variables
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content=f"""
         You are "Aria", a highly experienced Technical Lead and Interviewer for the role of {job_role} (Difficulty: {difficulty}).
         
         Your Goal: Conduct a realistic, structured, and professional technical interview that simulates a real-world top-tier company experience (e.g., Google or Meta).
@@ -44,10 +108,11 @@ async def generate_interview_response(history: list, job_role: str, difficulty:
         Format (ALWAYS USE THIS EXACT STRUCTURE):
         **Feedback:** (Your feedback, acknowledgement, or "N/A" if starting)
         **Next Question:** (The next technical question to continue the interview)
-        """),
+        """ + _context_prompt(summary, score_sheet)),
         MessagesPlaceholder(variable_name="history"),
     ])
 
+def _format_history(history: list) -> list:
     # Convert history dicts to message tuples for LangChain
     formatted_history = []
     for msg in history:
@@ -61,18 +126,127 @@ async def generate_interview_response(history: list, job_role: str, difficulty:
     # To be safe, let's add an internal trigger if empty.
     if not formatted_history:
         formatted_history.append(("human", "I am ready for the interview. Please start."))
+    return formatted_history
 
-    chain = prompt | llm
+def _record_prompt_tokens(response, prompt: "ChatPromptTemplate", inputs: Dict) -> int:
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens") or sum(
+        estimate_tokens(str(m.content)) for m in prompt.format_messages(**inputs)
+    )
+    _prompt_tokens.observe(prompt_tokens)
+    return prompt_tokens
+
+async def request_interview_response(
+    history: list, job_role: str, difficulty: str,
+    lane: str = llm_gateway.INTERACTIVE, dedupe: bool = True,
+    summary: str = None, score_sheet: list = None,
+) -> InterviewReply:
+    """
+    The Gemini call behind generate_interview_response; raises on failure.
+    dedupe=False forces a fresh generation (used to fill the opening bank).
+    """
+    prompt = _interview_prompt(job_role, difficulty, summary, score_sheet)
+    formatted_history = _format_history(history)
+    chain = prompt | llm_gateway.get_llm()
     
+    # Identical concurrent turns (same role/difficulty/context) share one Gemini call
+    inputs = {"history": formatted_history}
+    response = await llm_gateway.invoke(
+        "interview", chain, inputs,
+        lane=lane,
+        dedupe_key=content_key(job_role, difficulty, summary, score_sheet, formatted_history) if dedupe else None,
+    )
+    return InterviewReply(response.content.strip(), _record_prompt_tokens(response, prompt, inputs))
+
+async def stream_interview_turn(
+    history: list, job_role: str, difficulty: str, summary: str = None, score_sheet: list = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of generate_interview_turn. Yields ("token", text) as Gemini
+    writes the reply, then ("reply", InterviewReply) with the full message.
+    If Gemini fails before the first token, the canned fallback is sent as one
+    token; a failure mid-reply is raised, since part of it was already sent.
+    """
+    prompt = _interview_prompt(job_role, difficulty, summary, score_sheet)
+    inputs = {"history": _format_history(history)}
+    response = None
+    tokens = []
     try:
-        response = await chain.ainvoke({"history": formatted_history})
-        ai_content = response.content.strip()
-        
-        if not ai_content:
-            return "**Feedback:** N/A\n**Next Question:** Let's get back to the interview. Could you tell me more about your technical experience with " + job_role + "?"
-            
-        return ai_content
+        async for chunk in llm_gateway.astream("interview", prompt | llm_gateway.get_llm(), inputs):
+            response = chunk if response is None else response + chunk
+            text = chunk.content if isinstance(chunk.content, str) else ""
+            if not tokens:
+                text = text.lstrip()  # Same reply as generate_interview_turn's strip()
+            if text:
+                tokens.append(text)
+                yield "token", text
     except Exception as e:
+        if tokens:
+            raise
         print(f"DEBUG: LLM Call failed: {str(e)}")
-        # Provide a graceful fallback instead of crashing
-        return f"**Feedback:** I'm having a slight technical synchronization issue.\n**Next Question:** Let's proceed. Could you explain another key concept related to {job_role}?"
+        fallback = _fallback_reply(job_role)
+        yield "token", fallback
+        yield "reply", InterviewReply(fallback, None)
+        return
+
+    content = "".join(tokens).strip()
+    prompt_tokens = _record_prompt_tokens(response, prompt, inputs) if response is not None else None
+    if not content:
+        content = _empty_reply(job_role)
+        yield "token", content
+    yield "reply", InterviewReply(content, prompt_tokens)
+
+
+# ==========================================
+# ROLLING SUMMARY (older turns -> notes + score sheet)
+# ==========================================
+SUMMARY_TEMPLATE = """
+You are keeping notes on a technical interview for the role of {job_role} (Difficulty: {difficulty}).
+
+CURRENT NOTES (empty at the first update):
+{summary}
+
+CURRENT SCORE SHEET (JSON):
+{score_sheet}
+
+NEW TURNS TO FOLD IN:
+{transcript}
+
+Update the notes with the new turns. Return ONLY a JSON object:
+{{
+    "summary": "<at most 120 words: topics and questions covered so far, strengths and weak spots shown>",
+    "score_sheet": [{{"topic": "<2-5 word question topic>", "score": <1-10>, "note": "<at most 10 words>"}}]
+}}
+Keep every existing score sheet entry unchanged and add one entry per question answered in the new turns.
+"""
+
+def _transcript(messages: List[Dict]) -> str:
+    return "\n\n".join(
+        f"{'Candidate' if m['role'] == 'user' else 'Interviewer'}: {m['content']}" for m in messages
+    )
+
+async def summarize_turns(job_role: str, difficulty: str, summary: Optional[str], score_sheet: Optional[list], messages: List[Dict]) -> Tuple[str, list]:
+    """
+    Folds messages into the running summary and score sheet (one Gemini call on
+    the bulk lane, so it never delays a live turn). Raises if the reply is unusable.
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+
+    prompt = ChatPromptTemplate.from_template(SUMMARY_TEMPLATE)
+    response = await llm_gateway.invoke(
+        "interview_summary", prompt | llm_gateway.get_llm(),
+        {
+            "job_role": job_role,
+            "difficulty": difficulty,
+            "summary": summary or "",
+            "score_sheet": json.dumps(score_sheet or []),
+            "transcript": _transcript(messages),
+        },
+        lane=llm_gateway.BULK,
+    )
+    content = re.sub(r"^```(?:json)?\s*|\s*```$", "", response.content.strip())
+    data = json.loads(content)
+    new_sheet = [entry for entry in data.get("score_sheet") or [] if isinstance(entry, dict)]
+    if not isinstance(data.get("summary"), str) or len(new_sheet) < len(score_sheet or []):
+        raise ValueError("Summary update dropped earlier notes")
+    return data["summary"].strip(), new_sheet
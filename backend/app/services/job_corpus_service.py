@@ -0,0 +1,164 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional
+from sqlalchemy import text, bindparam, func, DateTime
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal, dialect_insert
+from app.models.job import Job
+
+# Max age of a job's posting date (posted_on) for each time_range filter
+TIME_RANGE_WINDOWS = {
+    "today": timedelta(days=1),
+    "3days": timedelta(days=3),
+    "week": timedelta(days=7),
+    "month": timedelta(days=30),
+}
+
+JOB_FIELDS = (
+    "job_id", "title", "company_name", "location", "description", "salary",
+    "job_type", "thumbnail", "posted_at", "apply_link", "platform", "is_verified",
+)
+
+
+_POSTED_AGO_RE = re.compile(r"\b(\d+|an?)\+?\s*(minute|hour|day|week|month)s?\s+ago\b")
+_POSTED_UNITS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=30),
+}
+
+
+def parse_posted_at(posted_at: Optional[str], seen: datetime) -> Optional[datetime]:
+    """
+    Resolves Google Jobs' relative posted_at ("3 days ago", "30+ days ago",
+    "Just posted") against the time it was seen. None when it can't be read.
+    """
+    value = (posted_at or "").strip().lower()
+    if value in ("just posted", "today"):
+        return seen
+    if value == "yesterday":
+        return seen - timedelta(days=1)
+    match = _POSTED_AGO_RE.search(value)
+    if not match:
+        return None
+    amount = 1 if match.group(1) in ("a", "an") else int(match.group(1))
+    return seen - amount * _POSTED_UNITS[match.group(2)]
+
+
+def upsert_jobs(db: Session, jobs: List[Dict]) -> int:
+    """
+    Inserts new jobs and refreshes existing ones (matched on SerpAPI job_id),
+    bumping last_seen and re-resolving posted_on. One statement per batch.
+    """
+    rows = {}
+    for job in jobs:
+        if job.get("job_id"):
+            rows[job["job_id"]] = {field: job.get(field) for field in JOB_FIELDS}
+    if not rows:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    values = [
+        dict(row, first_seen=now, last_seen=now, posted_on=parse_posted_at(row["posted_at"], now))
+        for row in rows.values()
+    ]
+
+    insert = dialect_insert(db.bind)
+    stmt = insert(Job).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["job_id"],
+        set_={
+            **{field: stmt.excluded[field] for field in JOB_FIELDS if field != "job_id"},
+            "last_seen": stmt.excluded.last_seen,
+            # An unreadable posted_at keeps the date resolved earlier
+            "posted_on": func.coalesce(stmt.excluded.posted_on, Job.__table__.c.posted_on),
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+    return len(values)
+
+
+def persist_jobs(jobs: List[Dict]):
+    """Standalone writer used off the request path (own session, errors only logged)."""
+    db = SessionLocal()
+    try:
+        upsert_jobs(db, jobs)
+    except Exception as e:
+        db.rollback()
+        print(f"WARNING: Failed to persist jobs to corpus: {str(e)}")
+    finally:
+        db.close()
+
+
+def _search_terms(query: str) -> List[str]:
+    return re.findall(r"[a-z0-9+#]+", query.lower())
+
+
+def search_corpus(db: Session, query: str, location: str = None, time_range: str = None, limit: int = 20) -> List[Dict]:
+    """
+    Full-text search over fresh corpus rows (seen within JOB_CORPUS_FRESH_HOURS),
+    best matches first. time_range filters on the posting date; jobs whose
+    posting date is unknown are left out of time_range searches.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+
+    now = datetime.now(timezone.utc)
+    params = {"cutoff": now - timedelta(hours=settings.JOB_CORPUS_FRESH_HOURS), "limit": limit}
+    posted_clause = ""
+    if time_range in TIME_RANGE_WINDOWS:
+        posted_clause = "AND jobs.posted_on >= :posted_cutoff"
+        params["posted_cutoff"] = now - TIME_RANGE_WINDOWS[time_range]
+    location_clause = ""
+    if location and location.lower() not in ("remote", "india"):
+        location_clause = "AND lower(jobs.location) LIKE :location"
+        params["location"] = f"%{location.lower()}%"
+
+    if db.bind.dialect.name == "postgresql":
+        params["q"] = " ".join(terms)
+        sql = f"""
+            SELECT jobs.id FROM jobs
+            WHERE jobs.search_vector @@ plainto_tsquery('english', :q)
+              AND jobs.last_seen >= :cutoff {posted_clause} {location_clause}
+            ORDER BY ts_rank(jobs.search_vector, plainto_tsquery('english', :q)) DESC, jobs.last_seen DESC
+            LIMIT :limit
+        """
+    else:
+        # Quote every term so FTS5 treats them as plain tokens (implicit AND)
+        params["q"] = " ".join(f'"{t}"' for t in terms)
+        sql = f"""
+            SELECT jobs.id FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid
+            WHERE jobs_fts MATCH :q
+              AND jobs.last_seen >= :cutoff {posted_clause} {location_clause}
+            ORDER BY bm25(jobs_fts), jobs.last_seen DESC
+            LIMIT :limit
+        """
+
+    stmt = text(sql).bindparams(bindparam("cutoff", type_=DateTime(timezone=True)))
+    if posted_clause:
+        stmt = stmt.bindparams(bindparam("posted_cutoff", type_=DateTime(timezone=True)))
+    ids = [row[0] for row in db.execute(stmt, params)]
+    if not ids:
+        return []
+
+    by_id = {job.id: job for job in db.query(Job).filter(Job.id.in_(ids))}
+    return [
+        {field: getattr(by_id[i], field) for field in JOB_FIELDS}
+        for i in ids if i in by_id
+    ]
+
+
+def search_corpus_standalone(query: str, location: str = None, time_range: str = None, limit: int = 20) -> List[Dict]:
+    db = SessionLocal()
+    try:
+        return search_corpus(db, query, location, time_range, limit)
+    except Exception as e:
+        print(f"WARNING: Corpus search failed, falling back to SerpAPI: {str(e)}")
+        return []
+    finally:
+        db.close()
@@ -0,0 +1,99 @@
+import re
+import zlib
+from typing import Dict, List, Optional
+import numpy as np
+
+# MinHash / LSH settings: 64 permutations in 16 bands of 4 rows catches pairs
+# above ~0.6 Jaccard with high probability; candidates are then verified
+# against DUPLICATE_THRESHOLD on the full signature.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.7
+
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240601)  # Fixed seed: signatures are stable across processes
+_PERM_A = _rng.integers(1, int(_PRIME), size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_PRIME), size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def shingles(job: Dict) -> List[str]:
+    """Word n-grams over title + company + description."""
+    text = f"{job.get('title') or ''} {job.get('company_name') or ''} {job.get('description') or ''}"
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def minhash_signature(job: Dict) -> np.ndarray:
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in set(shingles(job))), dtype=np.uint64
+    ) % _PRIME
+    if hashes.size == 0:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    # (a * x + b) mod p for every permutation x shingle, min per permutation
+    return ((np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _PRIME).min(axis=1)
+
+
+def _apply_options(job: Dict) -> List[Dict]:
+    options = job.get("apply_options")
+    if options:
+        return list(options)
+    if job.get("apply_link") and job.get("apply_link") != "#":
+        return [{"title": job.get("platform"), "link": job.get("apply_link")}]
+    return []
+
+
+class JobDeduplicator:
+    """
+    Incremental near-duplicate clustering. Each job is hashed into BANDS
+    buckets, so adding n jobs is O(n) apart from the (few) candidate checks.
+    The first job of a cluster is canonical; later duplicates only contribute
+    their apply options. Works on any job dicts (SerpAPI results, corpus rows).
+    """
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.jobs: List[Dict] = []
+        self._signatures: List[np.ndarray] = []
+        self._buckets: Dict[bytes, List[int]] = {}
+
+    def add(self, job: Dict) -> Optional[Dict]:
+        """Returns the (copied) job if it starts a new cluster, None if it was merged."""
+        signature = minhash_signature(job)
+        keys = [bytes([band]) + signature[band * ROWS:(band + 1) * ROWS].tobytes() for band in range(BANDS)]
+
+        candidates = {idx for key in keys for idx in self._buckets.get(key, ())}
+        for idx in sorted(candidates):
+            similarity = float(np.mean(self._signatures[idx] == signature))
+            if similarity >= self.threshold:
+                self._merge(self.jobs[idx], job)
+                return None
+
+        canonical = dict(job, apply_options=_apply_options(job))
+        idx = len(self.jobs)
+        self.jobs.append(canonical)
+        self._signatures.append(signature)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(idx)
+        return canonical
+
+    @staticmethod
+    def _merge(canonical: Dict, duplicate: Dict):
+        known_links = {o.get("link") for o in canonical["apply_options"]}
+        for option in _apply_options(duplicate):
+            if option.get("link") not in known_links:
+                canonical["apply_options"].append(option)
+                known_links.add(option.get("link"))
+
+
+def dedupe_jobs(jobs: List[Dict]) -> List[Dict]:
+    """Collapses near-identical postings, keeping the first of each cluster."""
+    deduplicator = JobDeduplicator()
+    for job in jobs:
+        deduplicator.add(job)
+    return deduplicator.jobs
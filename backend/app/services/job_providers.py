@@ -0,0 +1,356 @@
+import abc
+import asyncio
+import json
+import os
+import httpx
+from app.core.config import settings
+from app.core.metrics import metrics
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures", "jobs.json")
+
+
+# ==========================================
+# PROVIDER INTERFACE
+# ==========================================
+class JobProvider(abc.ABC):
+    """
+    A source of job listings. Implementations yield cleaned job dicts
+    (the shape produced by clean_job) page by page.
+
+    timeout:     per-provider budget inside a fan-out
+    hedge_after: if set, a second identical request is started when the
+                 first has not finished after this many seconds
+    """
+    name = "base"
+    persist = True  # Whether its jobs may be written to the jobs corpus
+
+    def __init__(self, timeout: float, hedge_after: Optional[float] = None):
+        self.timeout = timeout
+        self.hedge_after = hedge_after or None
+
+    @abc.abstractmethod
+    def iter_pages(self, query: str, location: str = "Remote", time_range: str = None) -> AsyncIterator[List[Dict]]:
+        """Async generator of result pages (lists of cleaned jobs)."""
+
+
+def clean_job(job: Dict) -> Optional[Dict]:
+    """Maps a raw Google Jobs result into the shape returned by our API."""
+    if not job.get("company_name"):
+        return None
+
+    apply_options = job.get("apply_options", [])
+    apply_link = apply_options[0].get("link") if apply_options else "#"
+    platform_name = apply_options[0].get("title") if apply_options else "Google Jobs"
+
+    is_verified = True if job.get("thumbnail") else False
+
+    salary = "Salary Not Disclosed"
+    if job.get("salary_info"):
+        salary = job.get("salary_info")
+    elif job.get("detected_extensions", {}).get("salary"):
+        salary = job.get("detected_extensions", {}).get("salary")
+
+    job_type = job.get("detected_extensions", {}).get("job_type", "Not Specified")
+
+    return {
+        "job_id": job.get("job_id"),
+        "title": job.get("title"),
+        "company_name": job.get("company_name"),
+        "location": job.get("location", "Remote"),
+        "description": job.get("description", "No description available."),
+        "salary": salary,
+        "job_type": job_type,
+        "thumbnail": job.get("thumbnail"),
+        "posted_at": job.get("detected_extensions", {}).get("posted_at", "Recently"),
+        "apply_link": apply_link,
+        "platform": platform_name,
+        "is_verified": is_verified,
+        "apply_options": [
+            {"title": o.get("title"), "link": o.get("link")} for o in apply_options if o.get("link")
+        ],
+    }
+
+
+# ==========================================
+# SERPAPI (Google Jobs)
+# ==========================================
+
+# Shared, connection-pooled client. Created lazily on the running event loop
+# and closed from the app shutdown hook.
+_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.SERPAPI_REQUEST_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.SERPAPI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SERPAPI_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def build_search_params(query: str, location: str = "Remote", time_range: str = None) -> Dict:
+    """Builds the SerpAPI google_jobs params (without api_key / page token)."""
+    # Map "Remote" to a valid location for SerpAPI
+    # SerpAPI doesn't support "Remote" as a location
+    if location.lower() == "remote":
+        location = "India"  # Default to India for remote jobs
+
+    # Map friendly names to SerpAPI chips
+    # date_posted:today, date_posted:3days, date_posted:week, date_posted:month
+    chips = []
+    if time_range:
+        chips.append(f"date_posted:{time_range}")
+
+    params = {
+        "engine": "google_jobs",
+        "q": query,
+        "location": location,
+        "hl": "en",
+        "gl": "in",
+    }
+
+    if chips:
+        params["chips"] = ",".join(chips)
+    return params
+
+
+class SerpApiError(Exception):
+    pass
+
+
+async def fetch_serpapi_page(params: Dict, next_page_token: str = None) -> Dict:
+    """One SerpAPI round trip on the shared client (per-request timeout from settings)."""
+    request_params = dict(params, api_key=settings.SERPAPI_KEY)
+    if next_page_token:
+        request_params["next_page_token"] = next_page_token
+
+    response = await get_http_client().get(SERPAPI_URL, params=request_params)
+    return response.json()
+
+
+class SerpApiProvider(JobProvider):
+    name = "serpapi"
+    pages_to_fetch = 2  # Target ~20 jobs if available
+
+    async def iter_pages(self, query: str, location: str = "Remote", time_range: str = None) -> AsyncIterator[List[Dict]]:
+        """
+        Google Jobs pages are chained: page N+1 needs the token from page N,
+        so each page is requested as soon as its token is known.
+        """
+        params = build_search_params(query, location, time_range)
+        next_page_token = None
+
+        for page in range(self.pages_to_fetch):
+            results = await fetch_serpapi_page(params, next_page_token)
+
+            if "error" in results:
+                raise SerpApiError(f"SerpAPI error on page {page}: {results['error']}")
+
+            jobs_list = results.get("jobs_results", [])
+            if not jobs_list:
+                break
+
+            cleaned_jobs = [cleaned for cleaned in map(clean_job, jobs_list) if cleaned]
+            if cleaned_jobs:
+                yield cleaned_jobs
+
+            # Check for next page
+            next_page_token = results.get("serpapi_pagination", {}).get("next_page_token")
+            if not next_page_token:
+                break
+
+
+# ==========================================
+# LOCAL FIXTURES (offline dev / fallback)
+# ==========================================
+class FixtureProvider(JobProvider):
+    """
+    Serves raw Google Jobs results from a JSON file (a list of jobs, or a
+    SerpAPI response with "jobs_results"). A job matches when every query
+    word appears in its title, company or description. Its jobs are never
+    written to the jobs corpus.
+    """
+    name = "fixture"
+    persist = False
+
+    def __init__(self, path: str, timeout: float, hedge_after: Optional[float] = None):
+        super().__init__(timeout, hedge_after)
+        self.path = path
+        self._jobs: Optional[List[Dict]] = None
+
+    def _load(self) -> List[Dict]:
+        if self._jobs is None:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            raw_jobs = data.get("jobs_results", []) if isinstance(data, dict) else data
+            self._jobs = [cleaned for cleaned in map(clean_job, raw_jobs) if cleaned]
+        return self._jobs
+
+    async def iter_pages(self, query: str, location: str = "Remote", time_range: str = None) -> AsyncIterator[List[Dict]]:
+        words = query.lower().split()
+        matches = [
+            job for job in self._load()
+            if all(w in f"{job['title']} {job['company_name']} {job['description']}".lower() for w in words)
+        ]
+        if matches:
+            yield matches
+
+
+_providers: Optional[List[JobProvider]] = None
+
+def get_providers() -> List[JobProvider]:
+    """Providers enabled via JOB_PROVIDERS (comma separated, in priority order)."""
+    global _providers
+    if _providers is not None:
+        return _providers
+
+    providers = []
+    for name in (n.strip().lower() for n in settings.JOB_PROVIDERS.split(",")):
+        if name == "serpapi":
+            providers.append(SerpApiProvider(settings.SERPAPI_PROVIDER_TIMEOUT, settings.SERPAPI_HEDGE_AFTER))
+        elif name == "fixture":
+            providers.append(FixtureProvider(settings.JOB_FIXTURE_PATH or DEFAULT_FIXTURE_PATH, settings.FIXTURE_PROVIDER_TIMEOUT))
+        elif name:
+            print(f"WARNING: Unknown job provider '{name}' in JOB_PROVIDERS, skipping")
+    _providers = providers
+    return providers
+
+
+# ==========================================
+# FAN-OUT EXECUTOR
+# ==========================================
+async def _collect(provider: JobProvider, query: str, location: str, time_range: str, jobs: List[Dict]):
+    # Appends in place so a timeout still keeps the pages that arrived
+    async for page_jobs in provider.iter_pages(query, location, time_range):
+        jobs.extend(page_jobs)
+
+
+async def _run_provider(provider: JobProvider, query: str, location: str, time_range: str, timeout: Optional[float] = None) -> Tuple[List[Dict], bool]:
+    """
+    Runs one provider under its timeout (or the shorter timeout given), optionally
+    hedged. Returns (jobs, completed); errors and timeouts yield partial results.
+    """
+    if timeout is None or timeout > provider.timeout:
+        timeout = provider.timeout
+    attempts: List[Tuple[asyncio.Task, List[Dict]]] = []
+
+    def start_attempt():
+        jobs: List[Dict] = []
+        attempts.append((asyncio.ensure_future(_collect(provider, query, location, time_range, jobs)), jobs))
+
+    latency = metrics.histogram(f"job_provider.{provider.name}.latency_seconds")
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout
+    start_attempt()
+
+    try:
+        while True:
+            pending = [task for task, _ in attempts if not task.done()]
+            if not pending:
+                break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            wait = remaining
+            if provider.hedge_after and len(attempts) == 1:
+                wait = min(remaining, max(0.0, started + provider.hedge_after - loop.time()))
+
+            done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((t for t in done if not t.cancelled() and t.exception() is None), None)
+            if winner is not None:
+                latency.observe(loop.time() - started)
+                return next(jobs for task, jobs in attempts if task is winner), True
+
+            # Hedge (or retry, if the first attempt already failed) once
+            if provider.hedge_after and len(attempts) == 1 and loop.time() < deadline:
+                metrics.counter(f"job_provider.{provider.name}.hedged").inc()
+                start_attempt()
+
+        # Every attempt failed or the provider timed out: keep the best partial result
+        for task, _ in attempts:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                print(f"ERROR: Job provider '{provider.name}' failed: {task.exception()}")
+        if any(not task.done() for task, _ in attempts):
+            print(f"WARNING: Job provider '{provider.name}' timed out after {timeout}s")
+            metrics.counter(f"job_provider.{provider.name}.timeouts").inc()
+        else:
+            metrics.counter(f"job_provider.{provider.name}.errors").inc()
+        return max((jobs for _, jobs in attempts), key=len), False
+    finally:
+        for task, _ in attempts:
+            task.cancel()
+
+
+async def fan_out_search(providers: List[JobProvider], query: str, location: str = "Remote", time_range: str = None, deadline: Optional[float] = None) -> Tuple[List[Dict], bool, List[Dict]]:
+    """
+    Queries all providers concurrently, each under its own timeout (capped at
+    deadline seconds, if given), and merges the results in provider priority
+    order. Returns (jobs, completed, persistable): completed is False if any
+    provider failed or ran out of time, and persistable holds the jobs of the
+    providers whose results may go into the jobs corpus.
+    """
+    if not providers:
+        return [], False, []
+
+    results = await asyncio.gather(*(_run_provider(p, query, location, time_range, deadline) for p in providers))
+    merged = [job for jobs, _ in results for job in jobs]
+    persistable = [job for provider, (jobs, _) in zip(providers, results) if provider.persist for job in jobs]
+    return merged, all(completed for _, completed in results), persistable
+
+
+async def fan_out_stream(providers: List[JobProvider], query: str, location: str = "Remote", time_range: str = None, status: Dict = None) -> AsyncIterator[Tuple[str, List[Dict]]]:
+    """
+    Streaming fan-out: yields (provider_name, page_jobs) as pages arrive from
+    any provider. Each provider is bounded by its own timeout. Hedging is not
+    used here since a duplicate stream would emit the same pages twice.
+    If given, status["completed"] is set once every provider has finished cleanly.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done_marker = object()
+
+    async def pump(provider: JobProvider):
+        completed = False
+        try:
+            async def forward():
+                async for page_jobs in provider.iter_pages(query, location, time_range):
+                    await queue.put((provider.name, page_jobs))
+            await asyncio.wait_for(forward(), timeout=provider.timeout)
+            completed = True
+        except asyncio.TimeoutError:
+            print(f"WARNING: Job provider '{provider.name}' timed out after {provider.timeout}s")
+            metrics.counter(f"job_provider.{provider.name}.timeouts").inc()
+        except Exception as e:
+            print(f"ERROR: Job provider '{provider.name}' failed: {str(e)}")
+            metrics.counter(f"job_provider.{provider.name}.errors").inc()
+        finally:
+            await queue.put((done_marker, completed))
+
+    tasks = [asyncio.ensure_future(pump(p)) for p in providers]
+    remaining = len(tasks)
+    all_completed = bool(tasks)
+    try:
+        while remaining:
+            name, page_jobs = await queue.get()
+            if name is done_marker:
+                remaining -= 1
+                all_completed = all_completed and page_jobs
+                continue
+            yield name, page_jobs
+        if status is not None:
+            status["completed"] = all_completed
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,94 @@
+import math
+from collections import Counter
+from itertools import repeat
+from typing import Dict, List
+import numpy as np
+
+# BM25 parameters (standard defaults)
+K1 = 1.5
+B = 0.75
+SKILL_BOOST = 3.0  # Extracted skills matter more than arbitrary resume words
+
+# Everything except letters, digits, '+' and '#' becomes a separator (keeps "c++", "c#")
+_SEPARATORS = str.maketrans({c: " " for c in map(chr, range(128)) if not (c.isalnum() or c in "+#")})
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "of", "on", "or", "our", "that", "the", "their", "this",
+    "to", "was", "we", "were", "will", "with", "you", "your", "i", "my", "me",
+}
+
+
+def _split(text: str) -> List[str]:
+    return (text or "").lower().translate(_SEPARATORS).split()
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _split(text) if t not in STOPWORDS and len(t) > 1]
+
+
+def _query_weights(resume_text: str, skills: List[str]) -> Dict[str, float]:
+    """Resume terms weighted by log term frequency, skill terms boosted on top."""
+    weights = {term: 1.0 + math.log(count) for term, count in Counter(tokenize(resume_text)).items()}
+    for skill in skills or []:
+        for term in tokenize(skill):
+            weights[term] = weights.get(term, 1.0) + SKILL_BOOST
+    return weights
+
+
+def score_jobs(jobs: List[Dict], resume_text: str, skills: List[str] = None) -> np.ndarray:
+    """
+    BM25 of every job (title + description) against the resume as a weighted query.
+    Builds one docs x query-terms count matrix for the batch and scores it in a
+    few NumPy ops. Returns raw scores aligned with `jobs`.
+    """
+    n_docs = len(jobs)
+    weights = _query_weights(resume_text, skills)
+    if not n_docs or not weights:
+        return np.zeros(n_docs)
+
+    vocab = {term: i for i, term in enumerate(weights)}
+    query = np.fromiter(weights.values(), dtype=np.float64, count=len(vocab))
+
+    # Map every token to its query-term id in one pass (-1 = not a query term),
+    # then count all (doc, term) pairs for the whole batch with a single bincount.
+    lookup = vocab.get
+    term_ids = []
+    doc_len = np.empty(n_docs, dtype=np.int64)
+    for d, job in enumerate(jobs):
+        tokens = _split(f"{job.get('title', '')} {job.get('description', '')}")
+        doc_len[d] = len(tokens)
+        term_ids.extend(map(lookup, tokens, repeat(-1, len(tokens))))
+
+    n_terms = len(vocab)
+    term_ids = np.array(term_ids, dtype=np.int64)
+    doc_ids = np.repeat(np.arange(n_docs, dtype=np.int64), doc_len)
+    hit = term_ids >= 0
+    tf = np.bincount(
+        doc_ids[hit] * n_terms + term_ids[hit], minlength=n_docs * n_terms
+    ).reshape(n_docs, n_terms).astype(np.float64)
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+    avgdl = doc_len.mean() or 1.0
+    norm = K1 * (1.0 - B + B * doc_len / avgdl)
+    tf_part = tf * (K1 + 1.0) / (tf + norm[:, None])
+
+    return (tf_part * idf) @ query
+
+
+def rank_jobs(jobs: List[Dict], resume_text: str, skills: List[str] = None) -> List[Dict]:
+    """
+    Adds `match_score` (0-100, relative to the best job in the batch)
+    and returns the jobs sorted best match first.
+    """
+    if not jobs:
+        return jobs
+
+    scores = score_jobs(jobs, resume_text, skills)
+    top = scores.max()
+    normalized = np.round(scores / top * 100.0, 1) if top > 0 else np.zeros(len(jobs))
+
+    ranked = [dict(job, match_score=float(score)) for job, score in zip(jobs, normalized)]
+    ranked.sort(key=lambda j: j["match_score"], reverse=True)
+    return ranked
@@ -1,125 +1,248 @@
-from serpapi import GoogleSearch
+import asyncio
+from fastapi.concurrency import run_in_threadpool
+from app.core.cache import TTLCache, MISSING
 from app.core.config import settings
-from typing import List, Dict
+from app.core.singleflight import SingleFlight
+from app.services.job_corpus_service import persist_jobs, search_corpus_standalone
+from app.services.job_dedup_service import JobDeduplicator, dedupe_jobs
+from app.services.job_providers import build_search_params, get_providers, fan_out_search, fan_out_stream
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple
 
-def search_jobs_google(query: str, location: str = "Remote", time_range: str = None, platforms: str = None) -> List[Dict]:
+# Result cache in front of the job providers (stores cleaned, unfiltered jobs).
+# Fresher time ranges churn faster, so they expire sooner.
+SEARCH_CACHE_TTLS = {
+    "today": 15 * 60,
+    "3days": 60 * 60,
+    "week": 3 * 60 * 60,
+    "month": 6 * 60 * 60,
+}
+search_cache = TTLCache("job_search", maxsize=settings.SEARCH_CACHE_MAXSIZE, default_ttl=settings.SEARCH_CACHE_DEFAULT_TTL)
+# Identical concurrent searches share one upstream call
+search_flight = SingleFlight("job_search")
+_refreshing = set()
+_background_tasks = set()
+
+
+def platform_matcher(platforms: str = None) -> Optional[Callable[[Dict], bool]]:
+    """
+    Predicate for the requested platforms, or None when no filtering applies.
+    A job matches if any of its apply options is on a requested platform:
+    dedupe folds the same posting from several sites into one entry, whose
+    "platform" is only the first site it was seen on.
+    """
+    if not platforms:
+        return None
+
+    requested_platforms = [p.strip().lower() for p in platforms.split(",") if p.strip()]
+    if not requested_platforms or len(requested_platforms) >= 5:
+        return None
+
+    def matches(job: Dict) -> bool:
+        names = [job.get("platform") or ""] + [o.get("title") or "" for o in job.get("apply_options") or ()]
+        return any(req in name.lower() for name in names for req in requested_platforms)
+
+    return matches
+
+
+def filter_by_platform(jobs: List[Dict], platforms: str = None, fallback: bool = True) -> List[Dict]:
+    """Keeps only jobs from the requested platforms (falls back to all jobs if none match)."""
+    matches = platform_matcher(platforms)
+    if matches is None:
+        return jobs
+
+    filtered_jobs = [j for j in jobs if matches(j)]
+
+    if fallback and not filtered_jobs and jobs:
+        return jobs[:20]
+    return filtered_jobs
+
+
+def search_cache_key(params: Dict) -> Tuple:
+    """Normalized (query, location, chips, gl, hl) tuple so trivial variations share an entry."""
+    def norm(value) -> str:
+        return " ".join(str(value or "").lower().split())
+    return (
+        norm(params.get("q")),
+        norm(params.get("location")),
+        norm(params.get("chips")),
+        norm(params.get("gl")),
+        norm(params.get("hl")),
+    )
+
+
+def _cache_ttl(time_range: str = None) -> float:
+    return SEARCH_CACHE_TTLS.get(time_range, settings.SEARCH_CACHE_DEFAULT_TTL)
+
+
+async def _search_upstream(query: str, location: str, time_range: str = None) -> Tuple[List[Dict], bool, List[Dict]]:
+    """
+    Fans out to every enabled provider under the overall search deadline.
+    Returns (jobs, completed, corpus_jobs); completed is False on any provider
+    error/timeout, in which case jobs holds the pages that arrived in time.
+    corpus_jobs are the raw jobs that may be written to the jobs corpus.
+    """
+    # Every provider stops at the deadline with what it has, so nothing is lost to a hard cancel
+    jobs, completed, corpus_jobs = await fan_out_search(
+        get_providers(), query, location, time_range, deadline=settings.SEARCH_DEADLINE_SECONDS
+    )
+
+    # Same posting via LinkedIn / Naukri / company site -> one entry with all apply options
+    return dedupe_jobs(jobs), completed, corpus_jobs
+
+
+def _store_results(key: Tuple, jobs: List[Dict], completed: bool, time_range: str = None, corpus_jobs: List[Dict] = None):
+    # Deadline-truncated or errored results are served but not cached
+    if completed:
+        search_cache.set(key, jobs, ttl=_cache_ttl(time_range), stale_ttl=settings.SEARCH_CACHE_STALE_SECONDS)
+    # Only jobs from real providers go into the corpus (never fixtures)
+    if corpus_jobs:
+        _spawn(run_in_threadpool(persist_jobs, corpus_jobs))
+
+
+async def _fetch_and_cache(key: Tuple, params: Dict, time_range: str = None) -> List[Dict]:
+    async def fetch():
+        jobs, completed, corpus_jobs = await _search_upstream(params["q"], params["location"], time_range)
+        _store_results(key, jobs, completed, time_range, corpus_jobs)
+        return jobs
+
+    return await search_flight.do(key, fetch)
+
+
+async def _refresh_in_background(key: Tuple, params: Dict, time_range: str = None):
+    try:
+        await _fetch_and_cache(key, params, time_range)
+    except Exception as e:
+        print(f"WARNING: Background refresh failed for {key}: {str(e)}")
+    finally:
+        _refreshing.discard(key)
+
+
+def _spawn(coro):
+    """Fire-and-forget task that is kept referenced until it finishes."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _schedule_refresh(key: Tuple, params: Dict, time_range: str = None):
+    """Stale-while-revalidate: at most one background refresh per key."""
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    _spawn(_refresh_in_background(key, params, time_range))
+
+
+async def search_jobs_google(query: str, location: str = "Remote", time_range: str = None, platforms: str = None) -> List[Dict]:
     """
     time_range options: 'today' (24h), '3days', 'week', 'month'
     """
-    
-    # Map "Remote" to a valid location for SerpAPI
-    # SerpAPI doesn't support "Remote" as a location
-    if location.lower() == "remote":
-        location = "India"  # Default to India for remote jobs
-    
-    # Map friendly names to SerpAPI chips
-    # date_posted:today, date_posted:3days, date_posted:week, date_posted:month
-    chips = []
-    if time_range:
-        chips.append(f"date_posted:{time_range}")
-    
-    params = {
-        "engine": "google_jobs",
-        "q": query,
-        "location": location,
-        "hl": "en",
-        "gl": "in",
-        "api_key": settings.SERPAPI_KEY,
-    }
-    
-    if chips:
-        params["chips"] = ",".join(chips)
+    params = build_search_params(query, location, time_range)
 
     print(f"DEBUG: Search Query: {query}")
 
-    all_cleaned_jobs = []
-    pages_to_fetch = 2 # Target ~20 jobs if available
-    
     try:
-        next_page_token = None
-        
-        for page in range(pages_to_fetch):
-            current_params = params.copy()
-            if next_page_token:
-                current_params["next_page_token"] = next_page_token
-            
-            search = GoogleSearch(current_params)
-            results = search.get_dict()
-            
-            if "error" in results:
-                print(f"ERROR from SerpAPI on page {page}: {results['error']}")
-                break
-                
-            jobs_list = results.get("jobs_results", [])
-            if not jobs_list:
-                break
-                
-            for job in jobs_list:
-                if not job.get("company_name"): continue
-
-                apply_options = job.get("apply_options", [])
-                apply_link = apply_options[0].get("link") if apply_options else "#"
-                platform_name = apply_options[0].get("title") if apply_options else "Google Jobs"
-
-                is_verified = True if job.get("thumbnail") else False
-                
-                salary = "Salary Not Disclosed"
-                if job.get("salary_info"):
-                    salary = job.get("salary_info")
-                elif job.get("detected_extensions", {}).get("salary"):
-                    salary = job.get("detected_extensions", {}).get("salary")
-                
-                job_type = job.get("detected_extensions", {}).get("job_type", "Not Specified")
-
-                all_cleaned_jobs.append({
-                    "job_id": job.get("job_id"),
-                    "title": job.get("title"),
-                    "company_name": job.get("company_name"),
-                    "location": job.get("location", "Remote"),
-                    "description": job.get("description", "No description available."),
-                    "salary": salary,
-                    "job_type": job_type,
-                    "thumbnail": job.get("thumbnail"), 
-                    "posted_at": job.get("detected_extensions", {}).get("posted_at", "Recently"),
-                    "apply_link": apply_link,
-                    "platform": platform_name,
-                    "is_verified": is_verified
-                })
-            
-            # Check for next page
-            next_page_token = results.get("serpapi_pagination", {}).get("next_page_token")
-            if not next_page_token:
-                break
-                
-        # Filter by platform if specified
-        if platforms:
-            requested_platforms = [p.lower() for p in platforms.split(",")]
-            if len(requested_platforms) >= 5:
-                return all_cleaned_jobs
-                
-            filtered_jobs = [j for j in all_cleaned_jobs if any(req in j["platform"].lower() for req in requested_platforms)]
-            
-            if not filtered_jobs and all_cleaned_jobs:
-                return all_cleaned_jobs[:20]
-            return filtered_jobs
-            
-        return all_cleaned_jobs
+        key = search_cache_key(params)
+        cached, is_stale = search_cache.get_entry(key)
+        if cached is not MISSING:
+            if is_stale:
+                _schedule_refresh(key, params, time_range)
+            all_cleaned_jobs = cached
+        else:
+            all_cleaned_jobs = await _fetch_and_cache(key, params, time_range)
 
+        # Filter by platform if specified
+        return filter_by_platform(list(all_cleaned_jobs), platforms)
 
     except Exception as e:
-        error_msg = f"Error fetching jobs: {str(e)}"
-        print(error_msg)
+        # Providers already degrade to partial results; this only guards our own code
+        print(f"Error fetching jobs: {str(e)}")
         import traceback
         traceback.print_exc()
-        # Return error info for debugging
-        return [{
-            "title": "Search Error",
-            "company_name": "System",
-            "location": "N/A",
-            "description": error_msg,
-            "thumbnail": None,
-            "posted_at": "Now",
-            "apply_link": "#",
-            "platform": "Error",
-            "is_verified": False
-        }]
\ No newline at end of file
+        return []
+
+
+async def stream_jobs_google(query: str, location: str = "Remote", time_range: str = None, platforms: str = None) -> AsyncIterator[List[Dict]]:
+    """
+    Streaming variant of search_jobs_google: yields each page's jobs (from
+    any provider) as soon as it is cleaned, deduplicated and platform-filtered.
+    Cache hits come out as one batch.
+    """
+    params = build_search_params(query, location, time_range)
+    key = search_cache_key(params)
+
+    print(f"DEBUG: Streaming Search Query: {query}")
+
+    cached, is_stale = search_cache.get_entry(key)
+    if cached is not MISSING:
+        if is_stale:
+            _schedule_refresh(key, params, time_range)
+        yield filter_by_platform(list(cached), platforms)
+        return
+
+    providers = get_providers()
+    persisted = {p.name for p in providers if p.persist}
+    matches = platform_matcher(platforms)
+    deduplicator = JobDeduplicator()
+    corpus_jobs = []
+    unmatched = []
+    sent_any = False
+    status = {"completed": False}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SEARCH_DEADLINE_SECONDS
+    pages = fan_out_stream(providers, params["q"], params["location"], time_range, status)
+
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            try:
+                provider_name, page_jobs = await asyncio.wait_for(pages.__anext__(), timeout=remaining)
+            except StopAsyncIteration:
+                break
+            if provider_name in persisted:
+                corpus_jobs.extend(page_jobs)
+
+            # Duplicates of already-sent jobs are dropped; their apply options
+            # still end up on the canonical entry that gets cached.
+            page_jobs = [j for j in map(deduplicator.add, page_jobs) if j]
+            if matches is None:
+                batch = page_jobs
+            else:
+                # Held-back entries can start matching once a duplicate from a
+                # requested platform merged its apply option into them
+                candidates = unmatched + page_jobs
+                batch = [j for j in candidates if matches(j)]
+                unmatched = [j for j in candidates if not matches(j)]
+            if batch:
+                sent_any = True
+                yield batch
+    except asyncio.TimeoutError:
+        print(f"WARNING: Search deadline ({settings.SEARCH_DEADLINE_SECONDS}s) exceeded while streaming")
+    finally:
+        await pages.aclose()
+        _store_results(key, deduplicator.jobs, status["completed"], time_range, corpus_jobs)
+
+    # Same fallback as filter_by_platform: nothing matched -> show what we found
+    if not sent_any and unmatched:
+        yield unmatched[:20]
+
+
+async def search_jobs_hybrid(query: str, location: str = "Remote", time_range: str = None, platforms: str = None) -> List[Dict]:
+    """
+    Answers from the local job corpus when it has enough fresh matches,
+    and only goes to SerpAPI to top up the rest.
+    """
+    limit = settings.JOB_CORPUS_MIN_RESULTS
+    local_jobs = await run_in_threadpool(search_corpus_standalone, query, location, time_range, limit * 2)
+    matching = filter_by_platform(local_jobs, platforms, fallback=False)
+
+    if len(matching) >= limit:
+        print(f"DEBUG: Corpus hit for '{query}' ({len(matching)} jobs)")
+        return matching
+
+    print(f"DEBUG: Corpus has {len(matching)} jobs for '{query}', topping up from SerpAPI")
+    remote_jobs = await search_jobs_google(query, location, time_range, platforms)
+
+    seen = {j["job_id"] for j in matching if j.get("job_id")}
+    return dedupe_jobs(matching + [j for j in remote_jobs if not j.get("job_id") or j["job_id"] not in seen])
@@ -0,0 +1,85 @@
+import json
+from typing import Any, List, Tuple
+
+
+class JsonFieldStream:
+    """
+    Incremental parser for a streamed JSON object (e.g. Gemini output).
+    feed() returns the top-level (key, value) pairs completed by the new chunk,
+    so a client can render "ats_score" before "improvement_plan" is generated.
+    Text before the first "{" (such as a ```json fence) is ignored. Fields
+    that fail to parse are skipped; the caller still validates the full text.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = None    # Index just after the "{" or "," preceding a key
+        self._value_start = None  # Index just after the ":" of the current field
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.text += chunk
+        fields: List[Tuple[str, Any]] = []
+        text = self.text
+
+        while self._pos < len(text) and not self.done:
+            char = text[self._pos]
+            pos = self._pos
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._key_start = pos + 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_field(pos, fields)
+                    self.done = True
+            elif self._depth == 1 and char == ":" and self._value_start is None:
+                self._value_start = pos + 1
+            elif self._depth == 1 and char == ",":
+                self._complete_field(pos, fields)
+                self._key_start = pos + 1
+
+        return fields
+
+    def _complete_field(self, end: int, fields: List[Tuple[str, Any]]):
+        if self._key_start is None or self._value_start is None:
+            return
+        try:
+            key = json.loads(self.text[self._key_start:self._value_start - 1])
+            value = json.loads(self.text[self._value_start:end])
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(key, str):
+                fields.append((key, value))
+        self._key_start = None
+        self._value_start = None
+
+    def document(self) -> str:
+        """The object text from the first "{" to the matching "}" (or to the end so far)."""
+        start = self.text.find("{")
+        if start == -1:
+            return ""
+        return self.text[start:self._pos] if self.done else self.text[start:]
@@ -0,0 +1,261 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, Hashable, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+# Every Gemini call in the app goes through this module:
+# one client, one rate limiter, priority lanes, retries and usage metrics.
+
+INTERACTIVE = "interactive"  # A user is waiting on the response (interview turns, single analyses)
+BULK = "bulk"                # Batch analyses; only served when no interactive call is queued
+LANES = (INTERACTIVE, BULK)  # Priority order
+
+TOKEN_BUCKETS = (100, 250, 500, 1000, 1500, 2000, 3000, 5000, 10000)
+
+_RETRYABLE_MARKERS = ("429", "500", "502", "503", "504", "RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED")
+
+
+class LLMOverloaded(Exception):
+    """No slot became free within the lane's queue timeout."""
+
+
+# ==========================================
+# CLIENT (built on first use)
+# ==========================================
+_llm: Optional["ChatGoogleGenerativeAI"] = None
+
+def get_llm() -> "ChatGoogleGenerativeAI":
+    global _llm
+    if _llm is None:
+        # Imported here: the Gemini SDK alone takes most of a second to import
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        _llm = ChatGoogleGenerativeAI(
+            model=settings.GEMINI_MODEL,
+            google_api_key=settings.GOOGLE_API_KEY,
+            temperature=settings.LLM_TEMPERATURE,
+            max_retries=0,  # Retries happen here, so they respect the limiter
+        )
+    return _llm
+
+
+# ==========================================
+# RATE LIMITING + PRIORITY LANES
+# ==========================================
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self):
+        """Called on a 429: Gemini says we are over quota, so stop bursting."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class PriorityLimiter:
+    """
+    Grants call slots in lane priority order, bounded by a token bucket
+    (requests per minute) and a concurrency cap. Waiters in the same lane
+    are served FIFO.
+    """
+
+    def __init__(self, bucket: TokenBucket, max_concurrency: int):
+        self.bucket = bucket
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self._depth = {lane: metrics.gauge(f"llm.lane.{lane}.queue_depth") for lane in LANES}
+        self._wait = {lane: metrics.histogram(f"llm.lane.{lane}.wait_seconds") for lane in LANES}
+        self._timeouts = {lane: metrics.counter(f"llm.lane.{lane}.timeouts") for lane in LANES}
+        self._in_flight = metrics.gauge("llm.in_flight")
+
+    def _update_gauges(self):
+        for lane, waiters in self._waiters.items():
+            self._depth[lane].set(sum(1 for f in waiters if not f.done()))
+        self._in_flight.set(self.active)
+
+    def _dispatch(self):
+        self._timer = None
+        while self.active < self.max_concurrency:
+            waiters = next((w for w in self._waiters.values() if w), None)
+            if waiters is None:
+                break
+            if waiters[0].done():  # Timed out or cancelled while queued
+                waiters.popleft()
+                continue
+            delay = self.bucket.take()
+            if delay > 0:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                break
+            self.active += 1
+            waiters.popleft().set_result(None)
+        self._update_gauges()
+
+    async def acquire(self, lane: str, timeout: float):
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        started = time.perf_counter()
+        self._dispatch()
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._timeouts[lane].inc()
+            self._update_gauges()
+            raise LLMOverloaded(f"No Gemini capacity within {timeout}s ({lane} lane)")
+        except asyncio.CancelledError:
+            # Granted just before the caller went away: hand the slot back
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        self._wait[lane].observe(time.perf_counter() - started)
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane: str, timeout: float):
+        await self.acquire(lane, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_limiter: Optional[PriorityLimiter] = None
+
+def get_limiter() -> PriorityLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = PriorityLimiter(
+            TokenBucket(settings.LLM_REQUESTS_PER_MINUTE / 60.0, settings.LLM_BURST),
+            settings.LLM_MAX_CONCURRENCY,
+        )
+    return _limiter
+
+
+def _queue_timeout(lane: str) -> float:
+    return settings.LLM_BULK_QUEUE_TIMEOUT if lane == BULK else settings.LLM_INTERACTIVE_QUEUE_TIMEOUT
+
+
+# ==========================================
+# RETRIES + USAGE
+# ==========================================
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    message = str(error)
+    return any(marker in message for marker in _RETRYABLE_MARKERS)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def record_usage(call: str, response, started: float):
+    """Records latency plus Gemini's reported input/output token counts."""
+    metrics.histogram(f"llm.{call}.latency_seconds").observe(time.perf_counter() - started)
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        metrics.histogram(f"llm.{call}.input_tokens", buckets=TOKEN_BUCKETS).observe(usage.get("input_tokens", 0))
+        metrics.histogram(f"llm.{call}.output_tokens", buckets=TOKEN_BUCKETS).observe(usage.get("output_tokens", 0))
+        print(f"DEBUG: Gemini {call}: {usage.get('input_tokens')} tokens in, {usage.get('output_tokens')} out")
+
+
+def _on_failure(call: str, error: Exception, attempt: int) -> bool:
+    """Bookkeeping for a failed attempt; returns True if it should be retried."""
+    if not is_retryable(error) or attempt + 1 >= settings.LLM_MAX_ATTEMPTS:
+        metrics.counter(f"llm.{call}.errors").inc()
+        return False
+    if "429" in str(error) or "RESOURCE_EXHAUSTED" in str(error):
+        get_limiter().bucket.drain()
+    metrics.counter(f"llm.{call}.retries").inc()
+    print(f"DEBUG: Gemini {call} attempt {attempt + 1} failed ({str(error)[:120]}), retrying")
+    return True
+
+
+# Identical concurrent calls (same prompt + same input) share one request
+llm_flight = SingleFlight("llm")
+
+
+async def _invoke(call: str, chain, inputs: Dict, lane: str):
+    for attempt in range(settings.LLM_MAX_ATTEMPTS):
+        try:
+            async with get_limiter().slot(lane, _queue_timeout(lane)):
+                started = time.perf_counter()
+                response = await chain.ainvoke(inputs)
+            record_usage(call, response, started)
+            return response
+        except LLMOverloaded:
+            raise
+        except Exception as e:
+            if not _on_failure(call, e, attempt):
+                raise
+        await asyncio.sleep(backoff_delay(attempt))
+
+
+async def invoke(call: str, chain, inputs: Dict, lane: str = INTERACTIVE, dedupe_key: Hashable = None) -> Any:
+    """
+    Runs chain.ainvoke(inputs) through the limiter with retries on 429/5xx.
+    call names the metrics (llm.<call>.*); calls on the same lane sharing a
+    dedupe_key while one is in flight get that call's result.
+    """
+    if dedupe_key is None:
+        return await _invoke(call, chain, inputs, lane)
+    # Keyed by lane too, so an interactive caller never waits on a bulk call's queue slot
+    return await llm_flight.do((call, lane, dedupe_key), lambda: _invoke(call, chain, inputs, lane))
+
+
+async def astream(call: str, chain, inputs: Dict, lane: str = INTERACTIVE) -> AsyncIterator[Any]:
+    """
+    chain.astream(inputs) holding one limiter slot for the whole stream.
+    Retried like invoke(), but only until the first chunk has been yielded.
+    """
+    for attempt in range(settings.LLM_MAX_ATTEMPTS):
+        emitted = False
+        response = None
+        try:
+            async with get_limiter().slot(lane, _queue_timeout(lane)):
+                started = time.perf_counter()
+                async for chunk in chain.astream(inputs):
+                    response = chunk if response is None else response + chunk
+                    emitted = True
+                    yield chunk
+            if response is not None:
+                record_usage(call, response, started)
+            return
+        except LLMOverloaded:
+            raise
+        except Exception as e:
+            if emitted or not _on_failure(call, e, attempt):
+                raise
+        await asyncio.sleep(backoff_delay(attempt))
+
@@ -0,0 +1,122 @@
+import re
+from typing import Dict, Optional
+from sqlalchemy import select, update
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, dialect_insert
+from app.models.resume import ParsedResume
+from app.services.resume_cache_service import sha256_hex
+from app.services.resume_service import extract_text_from_pdf, extract_search_params_with_llm, DEFAULT_SEARCH_PARAMS
+from app.services.skill_extractor import parse_resume_structure, record_fast_path
+
+# Bump when parse_resume_structure or the text it gets changes, so stored
+# artifacts are re-parsed (2: PDF pages joined with form feeds)
+PARSER_VERSION = "2"
+
+ARTIFACT_FIELDS = (
+    "raw_text", "sections", "skills", "titles", "years_of_experience",
+    "search_params", "search_params_source",
+)
+
+# Clients reference an artifact by parsed_resume_id, the SHA-256 of the PDF
+# bytes: it cannot be guessed or enumerated without the file itself, unlike
+# the sequential parsed_resumes.id ("id"), which never leaves the server.
+_PARSED_RESUME_ID = re.compile(r"[0-9a-f]{64}")
+
+PRIVATE_FIELDS = ("id", "raw_text")
+
+
+def _to_dict(row: ParsedResume) -> Dict:
+    data = {field: getattr(row, field) for field in ARTIFACT_FIELDS}
+    data.update(id=row.id, parsed_resume_id=row.content_hash, parser_version=row.parser_version)
+    return data
+
+
+def public_view(parsed: Dict) -> Dict:
+    """The artifact as returned to clients (no internal id, no raw text)."""
+    return {key: value for key, value in parsed.items() if key not in PRIVATE_FIELDS}
+
+
+async def _load(content_hash: str) -> Optional[Dict]:
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(ParsedResume).where(ParsedResume.content_hash == content_hash)
+        )).scalar_one_or_none()
+        return _to_dict(row) if row else None
+
+
+async def _upsert(content_hash: str, values: Dict) -> int:
+    """Inserts or refreshes the artifact for a PDF and returns its id."""
+    async with AsyncSessionLocal() as db:
+        insert = dialect_insert(db.bind)
+        stmt = insert(ParsedResume).values(content_hash=content_hash, parser_version=PARSER_VERSION, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["content_hash"],
+            set_=dict(parser_version=PARSER_VERSION, **values),
+        ).returning(ParsedResume.id)
+        resume_id = (await db.execute(stmt)).scalar_one()
+        await db.commit()
+        return resume_id
+
+
+async def _save_search_params(parsed_id: int, params: Dict, source: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(ParsedResume)
+            .where(ParsedResume.id == parsed_id)
+            .values(search_params=params, search_params_source=source)
+        )
+        await db.commit()
+
+
+async def parse_resume_upload(file_content: bytes) -> Dict:
+    """
+    Returns the parsed artifact for a PDF upload, parsing it only if this
+    exact file has not been seen before (or was parsed by an older parser).
+    Raises PdfLimitError for oversized PDFs, PdfProcessingError when extraction
+    times out or crashes, and ValueError for PDFs without text.
+    """
+    content_hash = sha256_hex(file_content)
+    existing = await _load(content_hash)
+    if existing and existing["parser_version"] == PARSER_VERSION:
+        print(f"DEBUG: Reusing parsed resume {existing['id']}")
+        return existing
+
+    text = await extract_text_from_pdf(file_content)
+    if not text.strip():
+        raise ValueError("Could not extract text from this PDF. It might be an image-only PDF.")
+
+    structure = parse_resume_structure(text)
+    confident = structure["confidence"] >= settings.LOCAL_EXTRACTOR_MIN_CONFIDENCE
+    values = {
+        "raw_text": text,
+        "sections": structure["sections"],
+        "skills": structure["skills"],
+        "titles": structure["titles"],
+        "years_of_experience": structure["years_of_experience"],
+        # Low-confidence params are left for Gemini, on the first search only
+        "search_params": structure["search_params"] if confident else None,
+        "search_params_source": "local" if confident else None,
+    }
+    parsed_id = await _upsert(content_hash, values)
+    print(f"DEBUG: Parsed resume {parsed_id} (confidence {structure['confidence']})")
+    return dict(values, id=parsed_id, parsed_resume_id=content_hash, parser_version=PARSER_VERSION)
+
+
+async def get_parsed_resume(parsed_resume_id: str) -> Optional[Dict]:
+    if not _PARSED_RESUME_ID.fullmatch(parsed_resume_id):
+        return None
+    return await _load(parsed_resume_id)
+
+
+async def resolve_search_params(parsed: Dict) -> Dict:
+    """Search params for a parsed resume; the Gemini fallback runs at most once per artifact."""
+    if parsed.get("search_params"):
+        record_fast_path(True)
+        return parsed["search_params"]
+
+    record_fast_path(False)
+    params = await extract_search_params_with_llm(parsed["raw_text"])
+    if params != DEFAULT_SEARCH_PARAMS:
+        await _save_search_params(parsed["id"], params, "gemini")
+        parsed.update(search_params=params, search_params_source="gemini")
+    return params
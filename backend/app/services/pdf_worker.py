@@ -0,0 +1,25 @@
+# Runs inside the PDF process pool. Kept free of app imports so spawned
+# workers start quickly and never touch settings, the DB or the LLM clients.
+# The API process imports this module only for PdfLimitError, so PyMuPDF is
+# imported inside extract_pages and only ever loads in the workers.
+
+
+class PdfLimitError(ValueError):
+    """The PDF is over one of the configured size/page limits."""
+
+
+class PdfProcessingError(ValueError):
+    """Extraction timed out or crashed the worker (hostile or malformed PDF)."""
+
+
+def extract_pages(file_content: bytes, max_pages: int) -> str:
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(stream=file_content, filetype="pdf")
+    try:
+        if doc.page_count > max_pages:
+            raise PdfLimitError(f"PDF has {doc.page_count} pages (limit is {max_pages})")
+        # Form feeds mark page breaks (used to spot running headers/footers)
+        return "\f".join(page.get_text() for page in doc)
+    finally:
+        doc.close()
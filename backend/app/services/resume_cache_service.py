@@ -0,0 +1,66 @@
+import hashlib
+from typing import Any, Optional, Union
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, dialect_insert
+from app.models.resume import ResumeCacheEntry
+
+# Values are content-addressed, so they never go stale; the TTL only bounds
+# how long a rarely used entry occupies memory. The DB copy is permanent.
+memory_cache = TTLCache("resume", maxsize=settings.RESUME_CACHE_MAXSIZE, default_ttl=settings.RESUME_CACHE_MEMORY_TTL)
+
+
+def sha256_hex(data: Union[bytes, str]) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def pdf_text_key(pdf_bytes: bytes, text_version: str) -> str:
+    return f"pdf_text:{sha256_hex(pdf_bytes)}:{text_version}"
+
+
+def analysis_key(resume_text: str, job_role: str, prompt_version: str) -> str:
+    role = " ".join(job_role.lower().split())
+    return f"analysis:{sha256_hex(resume_text)}:{sha256_hex(role)[:16]}:{prompt_version}"
+
+
+def search_params_key(resume_text: str, prompt_version: str) -> str:
+    return f"search_params:{sha256_hex(resume_text)}:{prompt_version}"
+
+
+async def _load(key: str) -> Optional[Any]:
+    async with AsyncSessionLocal() as db:
+        entry = await db.get(ResumeCacheEntry, key)
+        return entry.value if entry else None
+
+
+async def _store(key: str, value: Any):
+    async with AsyncSessionLocal() as db:
+        insert = dialect_insert(db.bind)
+        stmt = insert(ResumeCacheEntry).values(key=key, kind=key.split(":", 1)[0], value=value)
+        await db.execute(stmt.on_conflict_do_nothing(index_elements=["key"]))
+        await db.commit()
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """In-process LRU first, then the resume_cache table (DB errors count as a miss)."""
+    value = memory_cache.get(key)
+    if value is not None:
+        return value
+    try:
+        value = await _load(key)
+    except Exception as e:
+        print(f"WARNING: Resume cache lookup failed: {str(e)}")
+        return None
+    if value is not None:
+        memory_cache.set(key, value)
+    return value
+
+
+async def cache_set(key: str, value: Any):
+    memory_cache.set(key, value)
+    try:
+        await _store(key, value)
+    except Exception as e:
+        print(f"WARNING: Resume cache write failed: {str(e)}")
@@ -1,118 +1,321 @@
-import fitz  # PyMuPDF
-from langchain_core.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
+import asyncio
+import multiprocessing
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.singleflight import content_key
+from app.services import llm_gateway
+from app.services.llm_gateway import BULK, INTERACTIVE, TOKEN_BUCKETS, LLMOverloaded
+from app.services.pdf_worker import PdfLimitError, PdfProcessingError, extract_pages
+from app.services.json_stream import JsonFieldStream
+from app.services.skill_extractor import extract_search_params_locally, record_fast_path
+from app.services.resume_text import compact_resume_text, estimate_tokens
+from app.services.resume_cache_service import cache_get, cache_set, pdf_text_key, analysis_key, search_params_key
 import json
 import re
 
-# Initialize Gemini
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash", 
-    google_api_key=settings.GOOGLE_API_KEY,
-    temperature=0.3
-)
+# Bump when a prompt (or the text compaction feeding it) changes so cached
+# results from the old prompt are not reused
+ANALYSIS_PROMPT_VERSION = "2"
+SEARCH_PARAMS_PROMPT_VERSION = "2"
+# Bump when extract_pages changes its output (2: pages joined with form feeds)
+PDF_TEXT_VERSION = "2"
+
+ANALYSIS_TEMPLATE = """
+Act as a Senior Recruiter specializing in Entry-Level and University Hiring. 
+Analyze this resume for a Fresher/Junior position as a "{job_role}".
+
+SCORING RULES FOR FRESHERS:
+1. 'ats_score': (Integer 0-100). Focus on POTENTIAL and FOUNDATION.
+   - 80-100: Exceptional fresher (High-quality projects, strong internships, relevant tech stack).
+   - 60-79: Solid foundational skills (Standard academic projects, clear learning path).
+   - <60: Lacks hands-on projects, poor skill clarity, or bad formatting.
+2. Do NOT penalize for lack of "years of industry experience". Instead, reward for "Project Complexity" and "Skill Relevance".
+
+CONTENT GUIDELINES (FRESHER FOCUS):
+- 'summary': 2-3 sophisticated sentences summarizing their technical unique value proposition.
+
+REQUIRED DATA STRUCTURE:
+- 'brief_strengths': Exactly 3 professional points. Each point must be strictly approx 10 words. (FOR WEB DISPLAY).
+- 'brief_improvements': Exactly 3 growth areas. Each point must be strictly approx 10 words. (FOR WEB DISPLAY).
+
+- 'detailed_strengths': Exactly 5 high-impact professional points. Each point must be detailed and analytical (18-20 words). (FOR EMAIL REPORT).
+- 'detailed_improvements': Exactly 5 strategic growth areas. Each point must be detailed and explanatory (18-20 words). (FOR EMAIL REPORT).
+
+- 'missing_keywords': Exactly 6-8 foundational + modern tools.
+- 'improvement_plan': 4-5 specific strategic career steps.
+- 'motivational_quote': A high-caliber, short inspiring quote (10-15 words).
+
+Return a valid JSON object ONLY. No markdown or code blocks.
+
+Resume Text:
+{resume_text}
+""".strip()
+
+class AnalysisQuotaExceeded(Exception):
+    """Gemini stayed over quota (or the lane's queue timed out) on a bulk-lane analysis."""
+
+
+# Returned when Gemini answers 429 on an interactive analysis (never cached)
+QUOTA_EXCEEDED_ANALYSIS = {
+    "ats_score": 0,
+    "strong_points": [],
+    "weak_areas": [],
+    "missing_keywords": [],
+    "formatting_issues": ["API Quota Exceeded"],
+    "structure_feedback": "Please try again later.",
+    "improvement_plan": ["Wait 60 seconds and try again."],
+    "summary": "Quota exhausted."
+}
+
+# Used when Gemini's output is not valid JSON (never cached)
+FALLBACK_ANALYSIS = {
+    "ats_score": 0,
+    "strong_points": ["Review your PDF formatting"],
+    "weak_areas": [],
+    "missing_keywords": [],
+    "formatting_issues": ["AI Response Error"],
+    "structure_feedback": "Check content order.",
+    "improvement_plan": ["Contact support or try another PDF."],
+    "summary": "Analysis parsing failed."
+}
+
+# Returned when Gemini's search params cannot be parsed (never cached)
+DEFAULT_SEARCH_PARAMS = {
+    "role": "Software Engineer",
+    "experience_level": "Entry Level",
+    "skills": [],
+    "years_of_experience": 0
+}
+
+def compact_for_prompt(call: str, resume_text: str, token_budget: int) -> str:
+    """compact_resume_text plus before/after size metrics for the given call."""
+    compacted = compact_resume_text(resume_text, token_budget)
+    metrics.histogram(f"llm.{call}.resume_tokens_raw", buckets=TOKEN_BUCKETS).observe(estimate_tokens(resume_text))
+    metrics.histogram(f"llm.{call}.resume_tokens_sent", buckets=TOKEN_BUCKETS).observe(estimate_tokens(compacted))
+    return compacted
+
+# PyMuPDF is CPU-bound and not interruptible, so it runs in worker processes
+# instead of on the event loop. Spawned (not forked) workers only import
+# app.services.pdf_worker.
+class PdfWorkerPool:
+    """
+    PDF_WORKERS single-process executors, each running one job at a time. A
+    PDF that hangs or crashes MuPDF only costs its own worker: that process is
+    killed and replaced, while extractions running on the other workers (other
+    users, other batch items) carry on untouched.
+    """
+
+    def __init__(self, size: int):
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[ProcessPoolExecutor] = []
+        self._busy: List[ProcessPoolExecutor] = []
+
+    @staticmethod
+    def _new_worker() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @staticmethod
+    def _kill(worker: ProcessPoolExecutor):
+        for process in list(getattr(worker, "_processes", {}).values()):
+            process.terminate()
+        worker.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn, *args, timeout: float):
+        """
+        Runs fn(*args) on a free worker (waiting for one if all are busy; the
+        timeout only counts once the job is running). Raises asyncio.TimeoutError
+        or BrokenProcessPool after discarding that worker.
+        """
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else self._new_worker()
+            self._busy.append(worker)
+            reusable = False
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(worker.submit(fn, *args)), timeout)
+                reusable = True
+                return result
+            except (asyncio.TimeoutError, BrokenProcessPool):
+                raise
+            except Exception:
+                reusable = True  # Raised inside the worker (page limit, unreadable PDF): the process is fine
+                raise
+            finally:
+                self._busy.remove(worker)
+                if reusable:
+                    self._idle.append(worker)
+                else:
+                    # Timed out, crashed, or the caller was cancelled mid-job: never reuse that process
+                    self._kill(worker)
+
+    def shutdown(self):
+        for worker in self._idle + self._busy:
+            self._kill(worker)
+        self._idle, self._busy = [], []
+
+
+_pdf_pool: Optional[PdfWorkerPool] = None
+
+def get_pdf_pool() -> PdfWorkerPool:
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = PdfWorkerPool(settings.PDF_WORKERS)
+    return _pdf_pool
+
+def shutdown_pdf_pool():
+    global _pdf_pool
+    pool, _pdf_pool = _pdf_pool, None
+    if pool is not None:
+        pool.shutdown()
+
 
 async def extract_text_from_pdf(file_content: bytes) -> str:
-    """Read PDF bytes and return text."""
-    doc = fitz.open(stream=file_content, filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
+    """
+    Read PDF bytes and return text (cached by the SHA-256 of the bytes).
+    Raises PdfLimitError over the size/page caps and PdfProcessingError when
+    extraction times out or crashes the worker.
+    """
+    if len(file_content) > settings.PDF_MAX_BYTES:
+        raise PdfLimitError(f"PDF is {len(file_content)} bytes (limit is {settings.PDF_MAX_BYTES})")
+
+    key = pdf_text_key(file_content, PDF_TEXT_VERSION)
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        text = await get_pdf_pool().run(
+            extract_pages, file_content, settings.PDF_MAX_PAGES, timeout=settings.PDF_EXTRACT_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        raise PdfProcessingError(f"PDF extraction took longer than {settings.PDF_EXTRACT_TIMEOUT}s")
+    except BrokenProcessPool:
+        # The worker died (e.g. a malformed PDF crashed MuPDF); it has been replaced
+        raise PdfProcessingError("PDF could not be processed")
+
+    if text.strip():
+        await cache_set(key, text)
     return text
 
-async def analyze_resume_with_llm(resume_text: str, job_role: str) -> dict:
-    """Analyzes resume using Gemini and returns JSON with strength/weakness & structure analysis."""
-    
-    template = """
-    Act as a Senior Recruiter specializing in Entry-Level and University Hiring. 
-    Analyze this resume for a Fresher/Junior position as a "{job_role}".
-    
-    SCORING RULES FOR FRESHERS:
-    1. 'ats_score': (Integer 0-100). Focus on POTENTIAL and FOUNDATION.
-       - 80-100: Exceptional fresher (High-quality projects, strong internships, relevant tech stack).
-       - 60-79: Solid foundational skills (Standard academic projects, clear learning path).
-       - <60: Lacks hands-on projects, poor skill clarity, or bad formatting.
-    2. Do NOT penalize for lack of "years of industry experience". Instead, reward for "Project Complexity" and "Skill Relevance".
-
-    CONTENT GUIDELINES (FRESHER FOCUS):
-    - 'summary': 2-3 sophisticated sentences summarizing their technical unique value proposition.
-    
-    REQUIRED DATA STRUCTURE:
-    - 'brief_strengths': Exactly 3 professional points. Each point must be strictly approx 10 words. (FOR WEB DISPLAY).
-    - 'brief_improvements': Exactly 3 growth areas. Each point must be strictly approx 10 words. (FOR WEB DISPLAY).
-    
-    - 'detailed_strengths': Exactly 5 high-impact professional points. Each point must be detailed and analytical (18-20 words). (FOR EMAIL REPORT).
-    - 'detailed_improvements': Exactly 5 strategic growth areas. Each point must be detailed and explanatory (18-20 words). (FOR EMAIL REPORT).
-    
-    - 'missing_keywords': Exactly 6-8 foundational + modern tools.
-    - 'improvement_plan': 4-5 specific strategic career steps.
-    - 'motivational_quote': A high-caliber, short inspiring quote (10-15 words).
+def _analysis_chain():
+    from langchain_core.prompts import PromptTemplate  # Deferred with the Gemini client (see llm_gateway.get_llm)
 
-    SCORING REMINDER: Base scores on POTENTIAL and PROJECT COMPLEXITY for a Fresher role. 
-    80+ = Industry ready, 60-79 = Strong foundation, <60 = Needs major project work.
+    return PromptTemplate(template=ANALYSIS_TEMPLATE, input_variables=["job_role", "resume_text"]) | llm_gateway.get_llm()
 
-    Return a valid JSON object ONLY. No markdown or code blocks.
+def _analysis_inputs(resume_text: str, job_role: str) -> dict:
+    return {"job_role": job_role, "resume_text": compact_for_prompt("analyze", resume_text, settings.RESUME_TOKEN_BUDGET)}
 
-    Return a valid JSON object ONLY. No markdown.
+def parse_analysis(raw_content: str) -> Optional[dict]:
+    """Gemini's analysis text -> dict, tolerating code fences; None if it is not valid JSON."""
+    content = re.sub(r"```json|```", "", raw_content).strip()
+    start_idx = content.find('{')
+    end_idx = content.rfind('}')
+    if start_idx != -1 and end_idx != -1:
+        content = content[start_idx:end_idx+1]
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
 
-    Resume Text:
-    {resume_text}
+async def analyze_resume_with_llm(resume_text: str, job_role: str, lane: str = INTERACTIVE) -> dict:
+    """
+    Analyzes resume using Gemini and returns JSON with strength/weakness & structure analysis.
+    lane is the gateway priority (batch analyses pass llm_gateway.BULK). On the
+    bulk lane a quota failure raises AnalysisQuotaExceeded instead of returning
+    QUOTA_EXCEEDED_ANALYSIS, so the caller can retry rather than save the placeholder.
     """
+    key = analysis_key(resume_text, job_role, ANALYSIS_PROMPT_VERSION)
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
     
-    prompt = PromptTemplate(template=template, input_variables=["job_role", "resume_text"])
-    chain = prompt | llm
+    chain = _analysis_chain()
     
     try:
-        response = await chain.ainvoke({"job_role": job_role, "resume_text": resume_text})
+        inputs = _analysis_inputs(resume_text, job_role)
+        response = await llm_gateway.invoke(
+            "analyze", chain, inputs, lane=lane,
+            dedupe_key=content_key(ANALYSIS_TEMPLATE, inputs),
+        )
         raw_content = response.content.strip()
     except Exception as e:
         print(f"DEBUG: Gemini API call failed: {str(e)}")
-        if "429" in str(e):
-            return {
-                "ats_score": 0,
-                "strong_points": [],
-                "weak_areas": [],
-                "missing_keywords": [],
-                "formatting_issues": ["API Quota Exceeded"],
-                "structure_feedback": "Please try again later.",
-                "improvement_plan": ["Wait 60 seconds and try again."],
-                "summary": "Quota exhausted."
-            }
+        # Only after the gateway's retries / queue timeout ran out
+        if "429" in str(e) or isinstance(e, LLMOverloaded):
+            if lane == BULK:
+                raise AnalysisQuotaExceeded(str(e)) from e
+            return dict(QUOTA_EXCEEDED_ANALYSIS)
         raise e
     
-    # Clean up response to ensure valid JSON
-    content = raw_content
-    content = re.sub(r"```json|```", "", content).strip()
-    try:
-        start_idx = content.find('{')
-        end_idx = content.rfind('}')
-        if start_idx != -1 and end_idx != -1:
-            content = content[start_idx:end_idx+1]
-    except:
-        pass
-    
+    parsed_json = parse_analysis(raw_content)
+    if parsed_json is None:
+        return dict(FALLBACK_ANALYSIS)
+    # Only real analyses are cached, never the fallback / quota dicts
+    await cache_set(key, parsed_json)
+    return parsed_json
+
+async def stream_resume_analysis(resume_text: str, job_role: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of analyze_resume_with_llm. Yields ("field", (key, value))
+    as each top-level field of Gemini's JSON completes, then ("analysis", dict)
+    with the full result (the fallback dict only if the final text is invalid).
+    Cached analyses are replayed field by field.
+    """
+    key = analysis_key(resume_text, job_role, ANALYSIS_PROMPT_VERSION)
+    cached = await cache_get(key)
+    if cached is not None:
+        for field in cached.items():
+            yield "field", field
+        yield "analysis", cached
+        return
+
+    fields = JsonFieldStream()
     try:
-        parsed_json = json.loads(content)
-        return parsed_json
-    except json.JSONDecodeError:
-        # Fallback
-        return {
-            "ats_score": 0,
-            "strong_points": ["Review your PDF formatting"],
-            "weak_areas": [],
-            "missing_keywords": [],
-            "formatting_issues": ["AI Response Error"],
-            "structure_feedback": "Check content order.",
-            "improvement_plan": ["Contact support or try another PDF."],
-            "summary": "Analysis parsing failed."
-        }
+        async for chunk in llm_gateway.astream("analyze", _analysis_chain(), _analysis_inputs(resume_text, job_role)):
+            for field in fields.feed(chunk.content if isinstance(chunk.content, str) else ""):
+                yield "field", field
+    except Exception as e:
+        print(f"DEBUG: Gemini stream failed: {str(e)}")
+        if "429" in str(e) or isinstance(e, LLMOverloaded):
+            yield "analysis", dict(QUOTA_EXCEEDED_ANALYSIS)
+            return
+        raise e
+
+    parsed_json = parse_analysis(fields.text)
+    if parsed_json is None:
+        yield "analysis", dict(FALLBACK_ANALYSIS)
+        return
+    await cache_set(key, parsed_json)
+    yield "analysis", parsed_json
 
 async def extract_search_params_from_resume(resume_text: str) -> dict:
     """
     Scans a resume specifically to generate Job Search parameters.
     Does NOT calculate ATS score.
+    Tries the local taxonomy extractor first; Gemini is only used when its
+    confidence is below LOCAL_EXTRACTOR_MIN_CONFIDENCE.
     """
-    template = """
+    local_params, confidence = extract_search_params_locally(resume_text)
+    if confidence >= settings.LOCAL_EXTRACTOR_MIN_CONFIDENCE:
+        record_fast_path(True)
+        return local_params
+    record_fast_path(False)
+    print(f"DEBUG: Local extractor confidence {confidence}, asking Gemini")
+    return await extract_search_params_with_llm(resume_text)
+
+async def extract_search_params_with_llm(resume_text: str) -> dict:
+    """Gemini half of extract_search_params_from_resume (cached per resume text)."""
+    key = search_params_key(resume_text, SEARCH_PARAMS_PROMPT_VERSION)
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
+
+    # Dedented so the source indentation is not sent to Gemini on every call
+    template = textwrap.dedent("""
     Act as a Job Search Assistant. Read the following resume text and extract the best parameters to search for a new job.
     
     Return a strictly valid JSON object with these keys:
@@ -123,22 +326,25 @@ async def extract_search_params_from_resume(resume_text: str) -> dict:
     
     Resume Text:
     {resume_text}
-    """
+    """).strip()
     
+    from langchain_core.prompts import PromptTemplate
+
     prompt = PromptTemplate(template=template, input_variables=["resume_text"])
-    chain = prompt | llm
+    chain = prompt | llm_gateway.get_llm()
     
-    response = await chain.ainvoke({"resume_text": resume_text})
+    inputs = {"resume_text": compact_for_prompt("search_params", resume_text, settings.SEARCH_PARAMS_TOKEN_BUDGET)}
+    response = await llm_gateway.invoke(
+        "search_params", chain, inputs,
+        dedupe_key=content_key(template, inputs),
+    )
     
     content = response.content.strip()
     content = re.sub(r"```json|```", "", content)
     
     try:
-        return json.loads(content)
+        params = json.loads(content)
+        await cache_set(key, params)
+        return params
     except json.JSONDecodeError:
-        return {
-            "role": "Software Engineer", 
-            "experience_level": "Entry Level", 
-            "skills": [],
-            "years_of_experience": 0
-        }
\ No newline at end of file
+        return dict(DEFAULT_SEARCH_PARAMS)
\ No newline at end of file
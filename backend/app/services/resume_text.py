@@ -0,0 +1,170 @@
+import re
+from typing import Dict, List, Tuple
+
+# Canonical section names and the headings resumes commonly use for them
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "objective", "career objective", "about me"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "tech stack", "technologies", "tools"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "internships", "internship", "internship experience"],
+    "projects": ["projects", "academic projects", "personal projects", "key projects"],
+    "education": ["education", "academic background", "academics", "qualifications", "educational qualifications"],
+    "certifications": ["certifications", "certificates", "courses", "licenses & certifications"],
+    "achievements": ["achievements", "awards", "honors", "accomplishments"],
+    "activities": ["extracurricular activities", "activities", "volunteering", "positions of responsibility", "leadership"],
+    "interests": ["interests", "hobbies", "hobbies & interests"],
+    "languages": ["languages", "languages known"],
+    "personal": ["personal details", "personal information", "declaration", "references"],
+}
+
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+_HEADING_CLEAN_RE = re.compile(r"[^a-z& ]+")
+
+
+def _heading_name(line: str):
+    """Returns the canonical section for a heading line, or None."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 40:
+        return None
+    key = " ".join(_HEADING_CLEAN_RE.sub(" ", stripped.lower()).split())
+    return _HEADING_LOOKUP.get(key)
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Splits resume text into (section, body) pairs in document order.
+    Text before the first recognised heading is returned as "header"
+    (usually name and contact details).
+    """
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in text.splitlines():
+        name = _heading_name(line)
+        if name:
+            sections.append((name, []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, "\n".join(lines).strip()) for name, lines in sections]
+
+
+def sections_by_name(text: str) -> Dict[str, str]:
+    """Same as split_sections, merged per section name (repeated headings are joined)."""
+    merged: Dict[str, List[str]] = {}
+    for name, body in split_sections(text):
+        merged.setdefault(name, []).append(body)
+    return {name: "\n".join(bodies).strip() for name, bodies in merged.items()}
+
+
+# ==========================================
+# COMPACTION (before text goes into a Gemini prompt)
+# ==========================================
+
+# Rough Gemini tokenizer ratio for English resumes; only used for budgeting
+CHARS_PER_TOKEN = 4
+
+# Dropped whole, first to last, when over budget
+DROP_ORDER = ["personal", "interests", "languages", "activities", "achievements", "certifications"]
+# Then cut down to their first lines, first to last
+TRIM_ORDER = ["projects", "education", "experience", "summary", "skills", "header"]
+MIN_TRIMMED_LINES = 3
+
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d{1,3}(\s*(/|of)\s*\d{1,3})?$", re.IGNORECASE)
+_BULLET_RE = re.compile(r"^[\u2022\u25aa\u25cf\u25e6\u2023\u2043\u2219\u00b7\u27a2\u2713*>-]+\s*")
+_SPACES_RE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapses runs of spaces, unifies bullets and drops blank and page-number lines."""
+    lines = []
+    for line in text.replace("\r", "\n").splitlines():
+        line = _BULLET_RE.sub("- ", _SPACES_RE.sub(" ", line).strip())
+        if not line or line == "-" or _PAGE_NUMBER_RE.match(line):
+            continue
+        # PyMuPDF often repeats a line verbatim when text is drawn twice (bold, shadows)
+        if lines and lines[-1] == line:
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def strip_repeated_page_lines(text: str) -> str:
+    """
+    Removes running headers/footers: lines that sit in the first or last three
+    lines of at least two pages. The first occurrence is kept, so a name or
+    email in the header survives. Pages are separated by form feeds.
+    """
+    pages = [page.splitlines() for page in text.split("\f")]
+    if len(pages) < 2:
+        return text
+
+    edge_counts: Dict[str, int] = {}
+    for lines in pages:
+        edges = {line.strip() for line in lines[:3] + lines[-3:] if line.strip()}
+        for line in edges:
+            edge_counts[line] = edge_counts.get(line, 0) + 1
+    repeated = {line for line, count in edge_counts.items() if count >= 2 and not _heading_name(line)}
+
+    seen = set()
+    kept = []
+    for lines in pages:
+        for line in lines:
+            key = line.strip()
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def _render(sections: List[Tuple[str, List[str]]]) -> str:
+    parts = []
+    for name, lines in sections:
+        if not lines:
+            continue
+        parts.append("\n".join(lines) if name == "header" else f"{name.upper()}\n" + "\n".join(lines))
+    return "\n\n".join(parts)
+
+
+def compact_resume_text(text: str, token_budget: int) -> str:
+    """
+    Prompt-ready resume text: normalised whitespace, no running headers/footers
+    or page numbers, canonical section headings, and at most token_budget
+    (estimated) tokens. Over budget, low-value sections are dropped first,
+    then the remaining ones are cut down in TRIM_ORDER.
+    """
+    cleaned = normalize_whitespace(strip_repeated_page_lines(text))
+    # Repeated headings (e.g. "Projects" on two pages) are merged into one section
+    sections: List[Tuple[str, List[str]]] = [
+        (name, body.splitlines()) for name, body in sections_by_name(cleaned).items() if body
+    ]
+    compacted = _render(sections)
+    if estimate_tokens(compacted) <= token_budget:
+        return compacted
+
+    for name in DROP_ORDER:
+        sections = [(n, lines) for n, lines in sections if n != name]
+        compacted = _render(sections)
+        if estimate_tokens(compacted) <= token_budget:
+            return compacted
+
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    for name in TRIM_ORDER:
+        for idx, (n, lines) in enumerate(sections):
+            if n != name:
+                continue
+            # Drop trailing lines (older roles, minor projects) until it fits
+            overflow = len(compacted) - budget_chars
+            keep = len(lines)
+            while keep > MIN_TRIMMED_LINES and overflow > 0:
+                keep -= 1
+                overflow -= len(lines[keep]) + 1
+            sections[idx] = (n, lines[:keep])
+            compacted = _render(sections)
+        if len(compacted) <= budget_chars:
+            return compacted
+
+    return compacted[:budget_chars]
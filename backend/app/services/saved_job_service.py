@@ -0,0 +1,50 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import dialect_insert
+from app.core.pagination import keyset_page
+from app.models.job import SavedJob
+
+# Saved jobs are unique per (user_email, title, company_name), so saving is a
+# single INSERT ... ON CONFLICT DO NOTHING: no read first, and a double click
+# cannot create a duplicate.
+
+SAVED_JOB_FIELDS = ("title", "company_name", "location", "apply_link", "platform")
+
+# What the saved-jobs list renders; user_email is already known to the caller
+LIST_COLUMNS = (SavedJob.id,) + tuple(getattr(SavedJob, field) for field in SAVED_JOB_FIELDS) + (SavedJob.created_at,)
+
+
+def _insert_ignore(db: AsyncSession, rows: List[Dict]):
+    insert = dialect_insert(db.bind)
+    return (
+        insert(SavedJob)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["user_email", "title", "company_name"])
+        .returning(SavedJob.id)
+    )
+
+
+async def save_jobs(db: AsyncSession, rows: List[Dict]) -> List[int]:
+    """Inserts the rows that are not saved yet (one statement) and commits. Returns the new ids."""
+    if not rows:
+        return []
+    ids = list((await db.execute(_insert_ignore(db, rows))).scalars())
+    await db.commit()
+    return ids
+
+
+async def delete_jobs(db: AsyncSession, ids: List[int], user_email: Optional[str] = None) -> List[int]:
+    """Deletes by id (only the user's rows when user_email is given) and commits. Returns the deleted ids."""
+    stmt = delete(SavedJob).where(SavedJob.id.in_(ids))
+    if user_email is not None:
+        stmt = stmt.where(SavedJob.user_email == user_email)
+    deleted = list((await db.execute(stmt.returning(SavedJob.id))).scalars())
+    await db.commit()
+    return deleted
+
+
+async def list_saved_jobs(db: AsyncSession, user_email: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """One page of the user's saved jobs, newest first, and the cursor for the next page (None at the end)."""
+    query = select(*LIST_COLUMNS).where(SavedJob.user_email == user_email)
+    return await keyset_page(db, query, SavedJob.created_at, SavedJob.id, limit, cursor)
@@ -0,0 +1,351 @@
+import re
+from collections import Counter, deque
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.core.metrics import metrics
+from app.services.resume_text import sections_by_name
+
+# ==========================================
+# TAXONOMY
+# ==========================================
+# canonical skill -> (category, aliases). Aliases are matched case-insensitively
+# on word boundaries; ambiguous short names ("go", "r", "c") are left out.
+SKILLS: Dict[str, Tuple[str, List[str]]] = {
+    "Python": ("backend", ["python", "python3"]),
+    "Java": ("backend", ["java", "java 8", "java 11", "java 17"]),
+    "C++": ("backend", ["c++", "cpp"]),
+    "C#": ("backend", ["c#", "csharp"]),
+    "Go": ("backend", ["golang"]),
+    "Rust": ("backend", ["rust"]),
+    "PHP": ("backend", ["php", "laravel"]),
+    "Ruby": ("backend", ["ruby", "ruby on rails", "rails"]),
+    "Node.js": ("backend", ["node.js", "nodejs", "node js", "express.js", "expressjs"]),
+    "Django": ("backend", ["django", "django rest framework", "drf"]),
+    "Flask": ("backend", ["flask"]),
+    "FastAPI": ("backend", ["fastapi"]),
+    "Spring Boot": ("backend", ["spring boot", "springboot", "spring framework", "spring mvc"]),
+    ".NET": ("backend", [".net", "asp.net", "dotnet", ".net core"]),
+    "REST APIs": ("backend", ["rest api", "rest apis", "restful", "restful apis"]),
+    "GraphQL": ("backend", ["graphql"]),
+    "Microservices": ("backend", ["microservices", "microservice"]),
+    "SQL": ("data", ["sql"]),
+    "PostgreSQL": ("backend", ["postgresql", "postgres"]),
+    "MySQL": ("backend", ["mysql"]),
+    "MongoDB": ("backend", ["mongodb", "mongo db", "mongoose"]),
+    "Redis": ("backend", ["redis"]),
+    "Kafka": ("backend", ["kafka", "apache kafka"]),
+    "JavaScript": ("frontend", ["javascript", "es6"]),
+    "TypeScript": ("frontend", ["typescript"]),
+    "React": ("frontend", ["react", "react.js", "reactjs", "react js"]),
+    "Next.js": ("frontend", ["next.js", "nextjs"]),
+    "Angular": ("frontend", ["angular", "angularjs"]),
+    "Vue.js": ("frontend", ["vue", "vue.js", "vuejs"]),
+    "Redux": ("frontend", ["redux"]),
+    "HTML": ("frontend", ["html", "html5"]),
+    "CSS": ("frontend", ["css", "css3"]),
+    "Tailwind CSS": ("frontend", ["tailwind", "tailwind css", "tailwindcss"]),
+    "Bootstrap": ("frontend", ["bootstrap"]),
+    "Figma": ("design", ["figma"]),
+    "React Native": ("mobile", ["react native"]),
+    "Flutter": ("mobile", ["flutter", "dart"]),
+    "Kotlin": ("mobile", ["kotlin"]),
+    "Swift": ("mobile", ["swift", "swiftui"]),
+    "Android": ("mobile", ["android", "android studio"]),
+    "iOS": ("mobile", ["ios"]),
+    "Pandas": ("data", ["pandas"]),
+    "NumPy": ("data", ["numpy"]),
+    "Excel": ("data", ["excel", "ms excel", "advanced excel"]),
+    "Power BI": ("data", ["power bi", "powerbi"]),
+    "Tableau": ("data", ["tableau"]),
+    "Data Analysis": ("data", ["data analysis", "data analytics"]),
+    "Data Visualization": ("data", ["data visualization", "data visualisation", "matplotlib", "seaborn"]),
+    "Statistics": ("data", ["statistics", "statistical analysis"]),
+    "Apache Spark": ("data", ["spark", "pyspark", "apache spark"]),
+    "Machine Learning": ("ml", ["machine learning", "ml"]),
+    "Deep Learning": ("ml", ["deep learning", "neural networks"]),
+    "NLP": ("ml", ["nlp", "natural language processing"]),
+    "Computer Vision": ("ml", ["computer vision", "opencv"]),
+    "TensorFlow": ("ml", ["tensorflow", "keras"]),
+    "PyTorch": ("ml", ["pytorch"]),
+    "scikit-learn": ("ml", ["scikit-learn", "sklearn", "scikit learn"]),
+    "LLMs": ("ml", ["llm", "llms", "large language models", "langchain", "generative ai", "genai"]),
+    "AWS": ("devops", ["aws", "amazon web services", "ec2", "s3", "lambda"]),
+    "Azure": ("devops", ["azure", "microsoft azure"]),
+    "GCP": ("devops", ["gcp", "google cloud", "google cloud platform"]),
+    "Docker": ("devops", ["docker", "dockerfile"]),
+    "Kubernetes": ("devops", ["kubernetes", "k8s"]),
+    "Terraform": ("devops", ["terraform"]),
+    "CI/CD": ("devops", ["ci/cd", "ci cd", "github actions", "jenkins", "gitlab ci"]),
+    "Linux": ("devops", ["linux", "bash", "shell scripting"]),
+    "Git": ("tools", ["git", "github", "gitlab", "version control"]),
+    "Selenium": ("qa", ["selenium"]),
+    "Test Automation": ("qa", ["test automation", "automation testing", "pytest", "junit", "cypress"]),
+    "Cybersecurity": ("security", ["cybersecurity", "cyber security", "penetration testing", "network security"]),
+}
+
+# canonical role title -> aliases
+ROLE_TITLES: Dict[str, List[str]] = {
+    "Software Engineer": ["software engineer", "software developer", "sde", "software development engineer",
+                          "application developer", "programmer"],
+    "Backend Developer": ["backend developer", "backend engineer", "back-end developer", "back end developer",
+                          "python developer", "java developer", "node.js developer", "api developer"],
+    "Frontend Developer": ["frontend developer", "frontend engineer", "front-end developer", "front end developer",
+                           "react developer", "ui developer", "web developer"],
+    "Full Stack Developer": ["full stack developer", "full-stack developer", "fullstack developer",
+                             "full stack engineer", "mern stack developer", "mern developer"],
+    "Mobile App Developer": ["mobile developer", "android developer", "ios developer", "flutter developer",
+                             "mobile app developer", "app developer"],
+    "Data Analyst": ["data analyst", "business analyst", "bi analyst", "analytics intern"],
+    "Data Scientist": ["data scientist", "data science intern"],
+    "Data Engineer": ["data engineer", "etl developer", "big data engineer"],
+    "Machine Learning Engineer": ["machine learning engineer", "ml engineer", "ai engineer", "ai/ml engineer",
+                                  "deep learning engineer", "nlp engineer"],
+    "DevOps Engineer": ["devops engineer", "site reliability engineer", "sre", "cloud engineer", "platform engineer"],
+    "QA Engineer": ["qa engineer", "test engineer", "sdet", "quality assurance engineer", "automation tester"],
+    "UI/UX Designer": ["ui/ux designer", "ux designer", "ui designer", "product designer"],
+    "Cybersecurity Analyst": ["security analyst", "cybersecurity analyst", "security engineer", "soc analyst"],
+}
+
+# Role inferred from the dominant skill category when no title is found
+CATEGORY_ROLES = {
+    "backend": "Backend Developer",
+    "frontend": "Frontend Developer",
+    "mobile": "Mobile App Developer",
+    "data": "Data Analyst",
+    "ml": "Machine Learning Engineer",
+    "devops": "DevOps Engineer",
+    "qa": "QA Engineer",
+    "design": "UI/UX Designer",
+    "security": "Cybersecurity Analyst",
+}
+
+fast_path_hits = metrics.counter("resume.search_params.fast_path_hits")
+fast_path_misses = metrics.counter("resume.search_params.fast_path_misses")
+fast_path_hit_rate = metrics.gauge("resume.search_params.fast_path_hit_rate")
+
+
+def record_fast_path(hit: bool):
+    (fast_path_hits if hit else fast_path_misses).inc()
+    total = fast_path_hits.value + fast_path_misses.value
+    fast_path_hit_rate.set(round(fast_path_hits.value / total, 4) if total else 0.0)
+
+
+# ==========================================
+# AHO-CORASICK
+# ==========================================
+class AhoCorasick:
+    """
+    Multi-pattern matcher: one pass over the text finds every occurrence of
+    every pattern. Matches are reported only on word boundaries.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        # patterns: lowercased pattern text -> payload
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]  # (pattern length, payload)
+
+        for pattern, payload in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(pattern), payload))
+
+        # Breadth-first construction of failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yields (start, end, payload) for whole-word matches in lowercased text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                after_ok = i + 1 == n or not text[i + 1].isalnum()
+                if not after_ok:
+                    continue
+                for length, payload in out[state]:
+                    start = i - length + 1
+                    if start == 0 or not text[start - 1].isalnum():
+                        yield start, i + 1, payload
+
+
+def _longest_non_overlapping(matches: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+    """Prefers "react native" over "react", "spring boot" over "spring", etc."""
+    chosen, last_end = [], -1
+    for start, end, payload in sorted(matches, key=lambda m: (m[0], -(m[1] - m[0]))):
+        if start >= last_end:
+            chosen.append((start, end, payload))
+            last_end = end
+    return chosen
+
+
+_skill_matcher = AhoCorasick({alias: skill for skill, (_, aliases) in SKILLS.items() for alias in aliases})
+_title_matcher = AhoCorasick({alias: title for title, aliases in ROLE_TITLES.items() for alias in aliases})
+
+
+# ==========================================
+# EXPERIENCE (date ranges)
+# ==========================================
+_MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+_MONTH = r"(?:(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?,?\s*|(\d{1,2})\s*[/\-.]\s*)?"
+_DATE_RANGE_RE = re.compile(
+    _MONTH + r"((?:19|20)\d{2})\s*(?:-|–|—|to|till|until)\s*"
+    r"(?:" + _MONTH + r"((?:19|20)\d{2})|(present|current|now|till date|ongoing|today))",
+    re.IGNORECASE,
+)
+_EXPLICIT_YEARS_RE = re.compile(r"(\d{1,2})\+?\s*(?:years?|yrs?)\s+(?:of\s+)?(?:experience|exp)", re.IGNORECASE)
+
+
+def _month_index(month_name: Optional[str], month_num: Optional[str], year: str, default_month: int) -> int:
+    if month_name:
+        month = _MONTHS.get(month_name[:3].lower(), default_month)
+    elif month_num and 1 <= int(month_num) <= 12:
+        month = int(month_num)
+    else:
+        month = default_month
+    return int(year) * 12 + month - 1
+
+
+def estimate_years_of_experience(experience_text: str, today: date = None) -> Optional[float]:
+    """
+    Sums the (merged, non-overlapping) date ranges found in the experience
+    section. Falls back to an explicit "N years of experience" statement.
+    Returns None when nothing usable is found.
+    """
+    today = today or date.today()
+    now_index = today.year * 12 + today.month - 1
+
+    intervals = []
+    for m in _DATE_RANGE_RE.finditer(experience_text):
+        start = _month_index(m.group(1), m.group(2), m.group(3), 1)
+        if m.group(7):
+            end = now_index
+        else:
+            end = _month_index(m.group(4), m.group(5), m.group(6), 12)
+        if start <= end <= now_index + 1:
+            intervals.append((start, end + 1))
+
+    if intervals:
+        intervals.sort()
+        months, (cur_start, cur_end) = 0, intervals[0]
+        for start, end in intervals[1:]:
+            if start <= cur_end:
+                cur_end = max(cur_end, end)
+            else:
+                months += cur_end - cur_start
+                cur_start, cur_end = start, end
+        months += cur_end - cur_start
+        return round(months / 12, 1)
+
+    explicit = _EXPLICIT_YEARS_RE.search(experience_text)
+    if explicit:
+        return float(explicit.group(1))
+    return None
+
+
+def experience_level(years: float, is_internship_only: bool) -> str:
+    if is_internship_only and years < 1:
+        return "Internship"
+    if years < 2:
+        return "Entry Level"
+    if years < 5:
+        return "Mid Level"
+    return "Senior"
+
+
+# ==========================================
+# EXTRACTOR
+# ==========================================
+def parse_resume_structure(resume_text: str) -> Dict:
+    """
+    Deterministic structure of a resume: sections, ranked skills and titles,
+    years of experience, and search params in the same shape as the Gemini
+    prompt (role, experience_level, top 3 skills, years_of_experience),
+    plus a confidence for those search params.
+    """
+    sections = sections_by_name(resume_text)
+    lowered = resume_text.lower()
+
+    # Skills: every mention counts, mentions in the skills section count double
+    skill_counts: Counter = Counter()
+    categories: Counter = Counter()
+    skills_section = sections.get("skills", "").lower()
+    for text, weight in ((lowered, 1), (skills_section, 1)):
+        for _, _, skill in _longest_non_overlapping(list(_skill_matcher.iter_matches(text))):
+            skill_counts[skill] += weight
+            categories[SKILLS[skill][0]] += weight
+    ranked_skills = [skill for skill, _ in skill_counts.most_common()]
+    top_skills = ranked_skills[:3]
+
+    # Role: explicit titles in the summary/experience/header beat skill-based inference
+    title_counts: Counter = Counter()
+    for name in ("header", "summary", "experience"):
+        for _, _, title in _title_matcher.iter_matches(sections.get(name, "").lower()):
+            title_counts[title] += 2 if name != "experience" else 1
+    role_from_title = bool(title_counts)
+    if role_from_title:
+        role = title_counts.most_common(1)[0][0]
+    elif categories:
+        top_category = next((c for c, _ in categories.most_common() if c in CATEGORY_ROLES), None)
+        role = CATEGORY_ROLES.get(top_category, "Software Engineer")
+    else:
+        role = "Software Engineer"
+
+    # Experience: only the experience section, so education dates don't count
+    experience_text = sections.get("experience", "")
+    years = estimate_years_of_experience(experience_text) if experience_text else None
+    internship_only = bool(experience_text) and "intern" in experience_text.lower() and years is not None and years < 1
+    years_value = years if years is not None else 0.0
+
+    confidence = 0.0
+    confidence += 0.4 if role_from_title else (0.25 if categories else 0.0)
+    confidence += 0.3 * min(len(top_skills), 3) / 3
+    if "experience" in sections:
+        confidence += 0.3 if years is not None else 0.15
+    elif not re.search(r"\bexperience\b", lowered):
+        # No experience section at all: a fresher, and that is a confident answer
+        confidence += 0.3
+
+    return {
+        "sections": sections,
+        "skills": ranked_skills,
+        "titles": [title for title, _ in title_counts.most_common()],
+        "years_of_experience": years,
+        "search_params": {
+            "role": role,
+            "experience_level": experience_level(years_value, internship_only),
+            "skills": top_skills,
+            "years_of_experience": int(round(years_value)),
+        },
+        "confidence": round(confidence, 2),
+    }
+
+
+def extract_search_params_locally(resume_text: str) -> Tuple[Dict, float]:
+    """
+    Deterministic equivalent of the Gemini search-params prompt.
+    Returns (params, confidence).
+    """
+    structure = parse_resume_structure(resume_text)
+    return structure["search_params"], structure["confidence"]
@@ -0,0 +1,151 @@
+"""
+Requests per second on one worker: sync Session on the event loop vs. AsyncSession.
+
+Both variants serve GET /interview/history/{id} (load the session, then its
+messages) against a throwaway SQLite file, with a simulated network round trip
+added to every statement. "sync" is how the endpoints used to work: an
+async def route calling the blocking Session, so each round trip freezes the
+event loop. "async" is the real router on AsyncSessionLocal.
+
+Keep --concurrency below the pool size (DB_POOL_SIZE + DB_MAX_OVERFLOW) when running the sync
+variant: past that, a request waiting for a pooled connection blocks the event
+loop, so the connections held by finished requests are never handed back and
+every further request stalls for the full DB_POOL_TIMEOUT. The async
+variant just queues. Use --variant async to push it further.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_concurrency --latency-ms 5 --concurrency 10 --requests 500
+    python -m benchmarks.bench_db_concurrency --variant async --concurrency 100 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# A throwaway DB; set before app.core.database builds its engines
+_db_file = os.path.join(tempfile.mkdtemp(), "bench_db.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("MAIL_USERNAME", "bench")
+os.environ.setdefault("MAIL_PASSWORD", "bench")
+os.environ.setdefault("MAIL_FROM", "bench@example.com")
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI, HTTPException  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.util import await_only  # noqa: E402
+from app.core.database import Base, SessionLocal, async_engine, engine, get_db  # noqa: E402
+from app.api.v1.endpoints import interview  # noqa: E402
+from app.models.interview import InterviewSession, InterviewMessage  # noqa: E402
+from app.services.interview_message_service import backfill_from_history_sync  # noqa: E402
+
+LATENCY = 0.005
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _sync_round_trip(*args):
+    time.sleep(LATENCY)  # A blocking driver waits in the calling thread
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _async_round_trip(*args):
+    await_only(asyncio.sleep(LATENCY))  # An async driver yields to the event loop
+
+
+def seed(messages: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        history = [{"role": "ai" if n % 2 == 0 else "user", "content": f"message {n} " * 20} for n in range(messages)]
+        session = InterviewSession(user_email="bench@example.com", job_role="Backend", difficulty="Medium", history=history)
+        db.add(session)
+        db.commit()
+        backfill_from_history_sync(db, session)
+        return session.id
+    finally:
+        db.close()
+
+
+def sync_app() -> FastAPI:
+    """The pre-async /history: blocking queries straight from an async def route."""
+    app = FastAPI()
+
+    @app.get("/api/v1/interview/history/{session_id}")
+    async def get_history(session_id: int, db: Session = Depends(get_db)):
+        session = db.get(InterviewSession, session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        rows = (
+            db.query(InterviewMessage.seq, InterviewMessage.role, InterviewMessage.content)
+            .filter(InterviewMessage.session_id == session_id)
+            .order_by(InterviewMessage.seq)
+            .limit(100)
+            .all()
+        )
+        return [{"seq": seq, "role": role, "content": content} for seq, role, content in rows]
+
+    return app
+
+
+def async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(interview.router, prefix="/api/v1/interview")
+    return app
+
+
+async def run(app: FastAPI, session_id: int, concurrency: int, requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def user():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(f"/api/v1/interview/history/{session_id}")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await client.get(f"/api/v1/interview/history/{session_id}")  # Open the pool
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+async def main(variant: str, concurrency: int, requests: int, messages: int):
+    session_id = seed(messages)
+    print(f"{LATENCY * 1000:.1f} ms per statement (2 queries per request), "
+          f"{concurrency} concurrent clients, {requests} requests")
+
+    variants = []
+    if variant in ("both", "sync"):
+        variants.append(("sync Session (before)", sync_app()))
+    if variant in ("both", "async"):
+        variants.append(("AsyncSession (after)", async_app()))
+    for name, app in variants:
+        result = await run(app, session_id, concurrency, requests)
+        print(f"{name:<22} {result['rps']:>8.1f} req/s  p50={result['p50_ms']:>7.1f} ms  p95={result['p95_ms']:>7.1f} ms")
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--variant", choices=("both", "sync", "async"), default="both")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+    LATENCY = args.latency_ms / 1000
+    asyncio.run(main(args.variant, args.concurrency, args.requests, args.messages))
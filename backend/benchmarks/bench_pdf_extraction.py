@@ -0,0 +1,102 @@
+"""
+Event-loop stall during PDF extraction: inline PyMuPDF vs. the process pool.
+
+A heartbeat coroutine ticks every 5 ms while a large PDF is extracted; the
+worst and total lag of that heartbeat is how long every other request on the
+worker would have been frozen.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pdf_extraction --pages 200 --runs 3
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# Settings need these to import; the benchmark never touches the DB or Gemini
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("MAIL_USERNAME", "bench")
+os.environ.setdefault("MAIL_PASSWORD", "bench")
+os.environ.setdefault("MAIL_FROM", "bench@example.com")
+
+import fitz  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services import resume_service  # noqa: E402
+from app.services.pdf_worker import extract_pages  # noqa: E402
+
+TICK = 0.005
+
+
+def make_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    line = "Experienced Python developer: FastAPI, SQLAlchemy, PostgreSQL, Docker, AWS, Redis, Kafka."
+    for n in range(pages):
+        page = doc.new_page()
+        text = "\n".join(f"{n + 1}.{i} {line}" for i in range(110))
+        page.insert_text((24, 24), text, fontsize=6.5)
+    return doc.tobytes()
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        before = loop.time()
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, loop.time() - before - TICK))
+
+
+def legacy_extract(file_content: bytes) -> str:
+    # The original implementation: synchronous, with repeated string +=
+    doc = fitz.open(stream=file_content, filetype="pdf")
+    text = ""
+    for page in doc:
+        text += page.get_text()
+    return text
+
+
+async def measure(name: str, extract) -> dict:
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(TICK * 4)
+    started = time.perf_counter()
+    await extract()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return {
+        "mode": name,
+        "extract_s": round(elapsed, 3),
+        "max_stall_ms": round(max(lags, default=0) * 1000, 1),
+        "total_stall_ms": round(sum(lags) * 1000, 1),
+    }
+
+
+async def main(pages: int, runs: int):
+    pdf = make_pdf(pages)
+    print(f"PDF: {pages} pages, {len(pdf) / 1024:.0f} KiB, pool workers={settings.PDF_WORKERS}")
+
+    async def inline():
+        legacy_extract(pdf)
+
+    async def pooled():
+        await resume_service.get_pdf_pool().run(extract_pages, pdf, pages, timeout=settings.PDF_EXTRACT_TIMEOUT * 10)
+
+    # Warm the pool so worker spawn time is not billed to the first run
+    await pooled()
+
+    for _ in range(runs):
+        for name, fn in (("inline (before)", inline), ("process pool (after)", pooled)):
+            result = await measure(name, fn)
+            print(f"{result['mode']:<22} extract={result['extract_s']:>7}s  "
+                  f"max stall={result['max_stall_ms']:>8} ms  total stall={result['total_stall_ms']:>8} ms")
+
+    resume_service.shutdown_pdf_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.runs))
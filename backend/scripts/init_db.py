@@ -0,0 +1,31 @@
+"""
+Creates any missing tables (Base.metadata.create_all), retrying while the
+database is unreachable. Run it as a deploy / release step together with
+DB_CREATE_TABLES_ON_STARTUP=false so API workers never touch the schema
+while starting. Column and index changes to existing tables still go
+through the scripts/migrate_*.py scripts.
+
+Usage (from backend/):
+    python -m scripts.init_db [--attempts 10]
+"""
+import argparse
+import asyncio
+import sys
+from app.core.config import settings
+from app.core.database import async_engine, create_tables
+
+
+async def main(attempts: int) -> bool:
+    try:
+        created = await create_tables(attempts)
+    finally:
+        await async_engine.dispose()
+    print("Tables ready" if created else "Database unreachable, no tables created")
+    return created
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=settings.DB_INIT_RETRIES)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.attempts)) else 1)
@@ -0,0 +1,71 @@
+"""
+Moves interview history from the interview_sessions.history JSON column into
+interview_messages rows (one per message, ordered by seq), after adding the
+interview columns introduced since the tables were first created.
+
+Idempotent and safe to re-run or to run while the API is serving: sessions
+are claimed one at a time via message_count, exactly like the lazy backfill
+the API does on first access to a legacy session.
+
+Usage (from backend/):
+    python -m scripts.migrate_interview_messages [--batch 500]
+"""
+import argparse
+from sqlalchemy import inspect, text
+from app.core.database import engine, SessionLocal
+from app.models.interview import InterviewSession, InterviewMessage
+from app.services.interview_message_service import backfill_from_history_sync
+
+
+# Columns added after the tables were first created: (table, column, DDL type)
+ADDED_COLUMNS = [
+    ("interview_sessions", "message_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("interview_sessions", "summary", "TEXT"),
+    ("interview_sessions", "score_sheet", "JSON"),
+    ("interview_sessions", "summarized_through", "INTEGER NOT NULL DEFAULT 0"),
+    ("interview_messages", "prompt_tokens", "INTEGER"),
+]
+
+
+def ensure_schema():
+    """Creates interview_messages and adds any missing columns."""
+    InterviewMessage.__table__.create(bind=engine, checkfirst=True)
+    inspector = inspect(engine)
+    existing = {table: {c["name"] for c in inspector.get_columns(table)} for table in {t for t, _, _ in ADDED_COLUMNS}}
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            if column not in existing[table]:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                print(f"Added {table}.{column}")
+
+
+def backfill(batch: int) -> int:
+    migrated = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            sessions = (
+                db.query(InterviewSession)
+                .filter(InterviewSession.message_count == 0, InterviewSession.id > last_id)
+                .order_by(InterviewSession.id)
+                .limit(batch)
+                .all()
+            )
+            if not sessions:
+                break
+            last_id = sessions[-1].id
+            for session in sessions:
+                migrated += backfill_from_history_sync(db, session)
+            print(f"...up to session {last_id}: {migrated} migrated")
+    finally:
+        db.close()
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    ensure_schema()
+    print(f"Done: {backfill(args.batch)} sessions migrated")
@@ -0,0 +1,77 @@
+"""
+Upgrades an existing jobs table: adds the posted_on column and its index,
+then resolves posted_on for existing rows from their posted_at text
+("3 days ago") as of when each row was last seen, one batch per
+transaction. Rows whose posted_at can't be read keep posted_on NULL and
+drop out of time_range searches until SerpAPI returns them again.
+
+Idempotent and safe to run while the API is serving.
+
+Usage (from backend/):
+    python -m scripts.migrate_jobs [--batch 500]
+"""
+import argparse
+from datetime import timezone
+from sqlalchemy import DateTime, inspect, select, text, update
+from app.core.database import engine
+from app.models.job import Job
+from app.services.job_corpus_service import parse_posted_at
+
+TABLE = Job.__table__
+
+# Columns added after the table was first created: (column, type)
+ADDED_COLUMNS = [
+    ("posted_on", DateTime(timezone=True)),
+]
+
+
+def ensure_schema():
+    columns = {c["name"] for c in inspect(engine).get_columns("jobs")}
+    with engine.begin() as conn:
+        for column, column_type in ADDED_COLUMNS:
+            if column not in columns:
+                ddl = column_type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE jobs ADD COLUMN {column} {ddl}"))
+                print(f"Added jobs.{column}")
+        for index in TABLE.indexes:
+            index.create(bind=conn, checkfirst=True)
+            print(f"Index {index.name} ready")
+
+
+def resolve_posted_dates(batch: int) -> int:
+    resolved = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(TABLE.c.id, TABLE.c.posted_at, TABLE.c.last_seen)
+                .where(TABLE.c.posted_on.is_(None), TABLE.c.id > last_id)
+                .order_by(TABLE.c.id)
+                .limit(batch)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            for row in rows:
+                seen = row.last_seen
+                if seen is None:
+                    continue
+                if seen.tzinfo is None:
+                    seen = seen.replace(tzinfo=timezone.utc)  # SQLite hands back naive UTC
+                posted_on = parse_posted_at(row.posted_at, seen)
+                if posted_on is not None:
+                    conn.execute(
+                        update(TABLE).where(TABLE.c.id == row.id, TABLE.c.posted_on.is_(None)).values(posted_on=posted_on)
+                    )
+                    resolved += 1
+        print(f"...up to job {last_id}: {resolved} posting dates resolved")
+    print(f"{resolved} jobs given a posted_on")
+    return resolved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch", type=int, default=500, help="Rows per transaction")
+    args = parser.parse_args()
+    ensure_schema()
+    resolve_posted_dates(args.batch)
@@ -0,0 +1,98 @@
+"""
+Upgrades an existing resumes table: adds the raw_text_z and public_id
+columns, gives every row a random public_id (the analysis_id clients use),
+adds the (email, created_at, id) history and public_id indexes, then
+compresses the plain raw_text of older rows into raw_text_z (clearing
+raw_text), one batch per transaction.
+
+Idempotent and safe to run while the API is serving: the API reads either
+column. On Postgres the freed space is reused by new rows; run
+VACUUM FULL resumes afterwards to hand it back to the OS.
+
+Usage (from backend/):
+    python -m scripts.migrate_resumes [--batch 500]
+"""
+import argparse
+from sqlalchemy import LargeBinary, String, inspect, select, text, update
+from app.core.database import engine
+from app.models.resume import ResumeAnalysis, compress_text, new_public_id
+
+TABLE = ResumeAnalysis.__table__
+
+# Columns added after the table was first created: (column, type)
+ADDED_COLUMNS = [
+    ("raw_text_z", LargeBinary()),
+    ("public_id", String(32)),
+]
+
+
+def ensure_schema(batch: int):
+    columns = {c["name"] for c in inspect(engine).get_columns("resumes")}
+    with engine.begin() as conn:
+        for column, column_type in ADDED_COLUMNS:
+            if column not in columns:
+                ddl = column_type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE resumes ADD COLUMN {column} {ddl}"))
+                print(f"Added resumes.{column}")
+    assign_public_ids(batch)
+    with engine.begin() as conn:
+        for index in TABLE.indexes:
+            index.create(bind=conn, checkfirst=True)
+            print(f"Index {index.name} ready")
+
+
+def assign_public_ids(batch: int) -> int:
+    assigned = 0
+    while True:
+        with engine.begin() as conn:
+            ids = list(conn.execute(
+                select(TABLE.c.id).where(TABLE.c.public_id.is_(None)).order_by(TABLE.c.id).limit(batch)
+            ).scalars())
+            for row_id in ids:
+                conn.execute(
+                    update(TABLE).where(TABLE.c.id == row_id, TABLE.c.public_id.is_(None)).values(public_id=new_public_id())
+                )
+        if not ids:
+            break
+        assigned += len(ids)
+    print(f"{assigned} resumes given a public_id")
+    return assigned
+
+
+def compress_rows(batch: int) -> int:
+    plain, packed = TABLE.c.raw_text, TABLE.c.raw_text_z
+    compressed = 0
+    saved_bytes = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(TABLE.c.id, plain)
+                .where(plain.is_not(None), packed.is_(None), TABLE.c.id > last_id)
+                .order_by(TABLE.c.id)
+                .limit(batch)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            for row in rows:
+                data = compress_text(row.raw_text)
+                # Guarded on raw_text_z so a row the API rewrote meanwhile is left alone
+                conn.execute(
+                    update(TABLE)
+                    .where(TABLE.c.id == row.id, packed.is_(None))
+                    .values(raw_text_z=data, raw_text=None)
+                )
+                saved_bytes += len(row.raw_text.encode("utf-8")) - len(data)
+            compressed += len(rows)
+        print(f"...up to resume {last_id}: {compressed} compressed")
+    print(f"{compressed} resumes compressed, ~{saved_bytes / 1024:.0f} KiB saved")
+    return compressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch", type=int, default=500, help="Rows per transaction")
+    args = parser.parse_args()
+    ensure_schema(args.batch)
+    compress_rows(args.batch)
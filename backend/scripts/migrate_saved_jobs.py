@@ -0,0 +1,44 @@
+"""
+Adds the saved_jobs indexes to an existing database: the unique
+(user_email, title, company_name) index that saves rely on, and the
+(user_email, created_at, id) index behind the keyset-paginated listing.
+
+Duplicate saves (same user, title and company) must go before the unique
+index can be built; the oldest row of each group is kept.
+
+Usage (from backend/):
+    python -m scripts.migrate_saved_jobs [--dry-run]
+"""
+import argparse
+from sqlalchemy import func, select, delete
+from app.core.database import engine
+from app.models.job import SavedJob
+
+
+def duplicate_ids(conn):
+    keep = (
+        select(func.min(SavedJob.id))
+        .group_by(SavedJob.user_email, SavedJob.title, SavedJob.company_name)
+    )
+    return list(conn.execute(select(SavedJob.id).where(SavedJob.id.not_in(keep))).scalars())
+
+
+def migrate(dry_run: bool = False):
+    SavedJob.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        ids = duplicate_ids(conn)
+        print(f"{len(ids)} duplicate saved jobs" + (" (not removed: dry run)" if dry_run else " removed"))
+        if dry_run:
+            return
+        if ids:
+            conn.execute(delete(SavedJob).where(SavedJob.id.in_(ids)))
+        for index in SavedJob.__table__.indexes:
+            index.create(bind=conn, checkfirst=True)
+            print(f"Index {index.name} ready")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Only count duplicates")
+    args = parser.parse_args()
+    migrate(args.dry_run)
@@ -61,8 +61,17 @@ export const saveJob = async (jobData) => {
 };
 
 export const getSavedJobs = async (email) => {
-    const response = await axios.get(`${API_URL}/jobs/saved/${email}`);
-    return response.data;
+    // The list is paginated; follow X-Next-Cursor until the last page
+    let jobs = [];
+    let cursor = null;
+    do {
+        const response = await axios.get(`${API_URL}/jobs/saved/${email}`, {
+            params: cursor ? { cursor } : {}
+        });
+        jobs = jobs.concat(response.data);
+        cursor = response.headers['x-next-cursor'] || null;
+    } while (cursor);
+    return jobs;
 };
 
 export const removeSavedJob = async (jobId) => {